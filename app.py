@@ -1,10 +1,8 @@
 import streamlit as st
 from components.search_bar import search_bar
-from process import processQuery
-from ir_core.crawler_main import crawl
-from ir_core.index_manager import load_index
-from collections import Counter
-from sklearn.feature_extraction.text import TfidfVectorizer
+from process import processQuery, index_service, corpus_stats
+from ir_core.index_manager import ENGINES, query_cache_stats
+from ir_core.timing import METRICS_LOG
 
 import pandas as pd
 import numpy as np
@@ -41,9 +39,12 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
-docs = load_index()
+docs = index_service().docs
 if not docs:
-    st.warning("Data not indexed. **Run crawler** manually from the sidebar.")
+    st.warning(
+        "Data not indexed. **Run crawler** manually from the sidebar, or build "
+        "the indexes with `python -m ir_core.index_manager`."
+    )
 
 # Sidebar tab
 page = st.sidebar.selectbox("Navigate", ["Search", "Summary"])
@@ -53,7 +54,11 @@ with st.sidebar:
     st.header("Crawler status")
     if st.button("Update index (Run Crawler)"):
         with st.spinner("Crawling in progress ..."):
-            crawl(BASE_URL, ORG_URL, False)
+            # Selenium, requests and bs4 are only needed once a crawl starts
+            from ir_core.parallel_crawler import crawl_parallel
+
+            crawl_parallel(BASE_URL, ORG_URL, headless=False)
+        index_service().refresh(force=True)
         st.success("Crawl successful. Index updated!")
     # docs = load_index()
     if docs:
@@ -62,71 +67,59 @@ with st.sidebar:
         st.metric("Indexed publications", num_pubs)
         st.info(f"Last crawled: {last_crawled}")
     st.info("Crawl scheduled to run weekly")
+    cache_stats = query_cache_stats()
+    st.caption(
+        f"Query cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses"
+    )
 
 
 if page == "Search":
+    engine = st.sidebar.selectbox("Ranking engine", ENGINES)
+    log_timing = st.sidebar.checkbox("Log search timings", value=METRICS_LOG)
     userQuery, searchClicked = search_bar()
     if userQuery or searchClicked:
         try:
-            processQuery(userQuery)
+            processQuery(userQuery, engine, log_timing)
         except Exception as e:
             print("Error searching: ", e)
             st.error("Something went wrong. Try again later!")
 elif page == "Summary":
+    # Precomputed at index time
+    snapshot = index_service().snapshot()
+    stats = corpus_stats(snapshot.generation, snapshot.docs)
+
     st.header("📊 Crawling & Publication Summary")
     st.markdown("**Generated from current index**")
     col1, col2 = st.columns(2)
     with col1:
-        st.metric("Total Publications", len(docs))
+        st.metric("Total Publications", stats["total_publications"])
     with col2:
-        unique_authors = len(set(a for pub in docs for a in pub.get("authors", [])))
-        st.metric("Unique Authors", unique_authors)
+        st.metric("Unique Authors", stats["unique_authors"])
 
     st.subheader("Crawl Summary")
-    avg_authors = np.round(np.mean([len(p.get("authors", [])) for p in docs]), 1)
     st.json(
         {
-            "Total Detail Pages": len(docs),
-            "Avg Authors/Pub (Collaborations)": avg_authors,
+            "Total Detail Pages": stats["total_publications"],
+            "Avg Authors/Pub (Collaborations)": stats["avg_authors"],
         }
     )
 
     # Top Authors
     st.subheader("Top Authors")
-    author_pubs = Counter()
-    for pub in docs:
-        # Limit authors per publication
-        for author in pub.get("authors", [])[:10]:
-            author_pubs[author] += 1
-    top_authors = author_pubs.most_common(5)
-    df_top = pd.DataFrame(top_authors, columns=["Author", "Publications"])
+    df_top = pd.DataFrame(stats["top_authors"][:5], columns=["Author", "Publications"])
     # Start index from 1 instead of 0
     df_top.index = np.arange(1, len(df_top) + 1)
     st.dataframe(df_top, width="stretch")
 
     ## Term(words) Trends
     st.subheader("🏷️ Top words By Tf-Idf Scores")
-    all_content = " ".join(pub.get("content", "") for pub in docs)
-    vectorizer = TfidfVectorizer(
-        max_features=20, stop_words="english", ngram_range=(1, 2)
-    )
-    try:
-        tfidf = vectorizer.fit_transform([all_content])
-        keywords = vectorizer.get_feature_names_out()
-        scores = tfidf.toarray()[0]
-        df_keywords = pd.DataFrame(
-            {"Word": keywords, "Tf-Idf Score": scores}
-        ).sort_values("Tf-Idf Score", ascending=False)
+    if stats["top_terms"]:
+        df_keywords = pd.DataFrame(stats["top_terms"], columns=["Word", "Tf-Idf Score"])
         st.bar_chart(df_keywords.set_index("Word"))
         st.dataframe(df_keywords, hide_index=True)
-    except Exception as e:
-        print("Error: ", e)
+    else:
         st.info("Insufficient content for keywords.")
 
     st.subheader("Publications by Year")
-    years = [pub.get("year_only", "N/A") for pub in docs]
-    year_counts = Counter(y for y in years if y != "N/A")
-    df_years = pd.DataFrame(
-        list(year_counts.items()), columns=["Year", "Count"]
-    ).sort_values("Year")
+    df_years = pd.DataFrame(list(stats["years"].items()), columns=["Year", "Count"])
     st.bar_chart(df_years.set_index("Year"))
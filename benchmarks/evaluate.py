@@ -0,0 +1,129 @@
+"""
+Offline evaluation: every qrels query through every engine, ranking
+metrics and latency percentiles side by side.
+
+    python -m benchmarks.evaluate [--k 10] [--engines phrase tfidf keyword]
+        [--min-map 0.3] [--max-p95-ms 50] [--json results.json]
+
+Engines run in parallel, one process each, so an engine's queries never
+compete with each other for a core. Exits non-zero when a gate fails.
+"""
+
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Any, Tuple, Union
+
+from constants.constants import STANDARD_MAPPING_FILE
+from ir_core.evaluation import (
+    doc_id_map,
+    load_qrels,
+    ranking_metrics,
+    relevant_doc_ids,
+)
+from ir_core.index_manager import ENGINES, search
+from ir_core.index_service import get_index_service
+
+DEFAULT_ENGINES = ("phrase", "tfidf", "keyword")
+PERCENTILES = (50, 95, 99)
+WARMUP_QUERY = "warm up search index"
+
+
+def run_engine(
+    engine: str, qrels: Dict[str, List[Union[str, int]]], k: int
+) -> Tuple[Dict[str, float], List[float]]:
+    """Ranking metrics and latency (ms) of each query, index loaded once"""
+    snapshot = get_index_service().snapshot()
+    # The same doc ids as evaluate_search, for the judgements and the results
+    id_map = doc_id_map(snapshot.docs)
+    judged = {
+        query: sorted(relevant_doc_ids(docs, id_map)) for query, docs in qrels.items()
+    }
+    # Lazy imports and first-touch loads are not query latency
+    search(WARMUP_QUERY, top_k=k, engine=engine)
+    runs: Dict[str, List[int]] = {}
+    latencies: List[float] = []
+    for query in qrels:
+        started = time.perf_counter()
+        _, results = search(query, top_k=k, engine=engine)
+        latencies.append((time.perf_counter() - started) * 1000)
+        runs[query] = [
+            id_map[r["pub_link"]] for r in results if r["pub_link"] in id_map
+        ]
+    return ranking_metrics(runs, judged, k), latencies
+
+
+def evaluate(
+    qrels: Dict[str, List[Union[str, int]]], engines: List[str], k: int
+) -> Dict[str, Dict[str, Any]]:
+    report = {}
+    with ProcessPoolExecutor(len(engines)) as pool:
+        futures = {
+            engine: pool.submit(run_engine, engine, qrels, k) for engine in engines
+        }
+        for engine, future in futures.items():
+            metrics, latencies = future.result()
+            percentiles = np.percentile(latencies, PERCENTILES) if latencies else []
+            report[engine] = {
+                **metrics,
+                **{
+                    f"p{p}_ms": round(float(v), 3)
+                    for p, v in zip(PERCENTILES, percentiles)
+                },
+            }
+    return report
+
+
+def print_report(report: Dict[str, Dict[str, Any]]) -> None:
+    columns = list(next(iter(report.values())))
+    print(f"{'engine':<10}" + "".join(f"{c:>10}" for c in columns))
+    for engine, row in report.items():
+        print(f"{engine:<10}" + "".join(f"{row[c]:>10}" for c in columns))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--qrels", type=Path, default=STANDARD_MAPPING_FILE)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument(
+        "--engines", nargs="+", choices=ENGINES, default=list(DEFAULT_ENGINES)
+    )
+    parser.add_argument(
+        "--min-map", type=float, help="fail when an engine's MAP is lower"
+    )
+    parser.add_argument(
+        "--max-p95-ms", type=float, help="fail when an engine's p95 is higher"
+    )
+    parser.add_argument("--json", type=Path, help="also write the report here")
+    args = parser.parse_args()
+
+    qrels = load_qrels(args.qrels)
+    if not qrels:
+        print(f"No relevance judgements in {args.qrels}")
+        return 1
+    print(f"Evaluating {len(qrels)} queries at k={args.k} ...")
+    report = evaluate(qrels, args.engines, args.k)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    failures = []
+    for engine, row in report.items():
+        if args.min_map is not None and row["MAP"] < args.min_map:
+            failures.append(f"{engine} MAP {row['MAP']} < {args.min_map}")
+        if args.max_p95_ms is not None and row.get("p95_ms", 0) > args.max_p95_ms:
+            failures.append(f"{engine} p95 {row['p95_ms']}ms > {args.max_p95_ms}ms")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""
+Import-time budget for the modules the app loads on startup.
+
+    python -m benchmarks.import_time
+
+Each module is imported in a fresh interpreter; exits non-zero when one
+runs over its budget or drags in a dependency only crawling/indexing needs.
+"""
+
+import json
+import subprocess
+import sys
+
+from typing import Dict, List
+
+# Seconds, generous enough for a cold cache on a slow machine
+BUDGETS = {
+    "ir_core.preprocessors.preprocess": 0.3,
+    "ir_core.index_service": 1.0,
+    "ir_core.index_manager": 1.0,
+}
+HEAVY_MODULES = ("nltk", "sklearn", "selenium", "bs4", "requests")
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+__import__({module!r})
+elapsed = time.perf_counter() - start
+loaded = sorted({{name.split(".")[0] for name in sys.modules}} & set({heavy!r}))
+print(json.dumps({{"seconds": elapsed, "heavy": loaded}}))
+"""
+
+
+def measure(module: str) -> Dict:
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY_MODULES)],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> int:
+    failures: List[str] = []
+    print(f"{'module':<36} {'seconds':>8} {'budget':>8}  heavy imports")
+    for module, budget in BUDGETS.items():
+        result = measure(module)
+        print(
+            f"{module:<36} {result['seconds']:>8.3f} {budget:>8.1f}  "
+            f"{', '.join(result['heavy']) or '-'}"
+        )
+        if result["seconds"] > budget:
+            failures.append(f"{module} took {result['seconds']:.3f}s (> {budget}s)")
+        if result["heavy"]:
+            failures.append(f"{module} imported {', '.join(result['heavy'])}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
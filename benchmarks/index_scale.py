@@ -0,0 +1,229 @@
+"""
+Index build and query latency at scale, on synthetic corpora.
+
+    python -m benchmarks.index_scale [--sizes 1000 10000 100000 1000000]
+        [--queries 200] [--output scale.json]
+
+Each corpus size runs in a fresh interpreter inside a scratch directory, so
+peak RSS is that size's alone and the real data/ is never touched. Results
+are written as JSON, tagged with the commit, to compare runs across commits.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import resource
+import platform
+import tempfile
+import subprocess
+
+import numpy as np
+
+from pathlib import Path
+from typing import Dict, List, Any
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+QUERY_ENGINES = ("phrase", "keyword", "tfidf")
+PERCENTILES = (50, 90, 95, 99)
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in bytes on macOS, in KiB on Linux
+    unit = 1024**2 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / unit
+
+
+def timed(fn) -> float:
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def disk_usage(paths: List[Path]) -> int:
+    total = 0
+    for path in paths:
+        if path.is_dir():
+            total += sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+        elif path.exists():
+            total += path.stat().st_size
+    return total
+
+
+def sample_queries(
+    docs: List[Dict[str, Any]], n: int, seed: int
+) -> Dict[str, List[str]]:
+    """Queries drawn from the corpus itself, so every engine has matches"""
+    rng = random.Random(seed)
+    queries: Dict[str, List[str]] = {engine: [] for engine in QUERY_ENGINES}
+    for _ in range(n):
+        words = rng.choice(docs)["abstract"].rstrip(".").lower().split()
+        start = rng.randrange(len(words) - 3)
+        queries["phrase"].append(" ".join(words[start : start + rng.randint(2, 3)]))
+        queries["keyword"].append(rng.choice(words))
+        queries["tfidf"].append(" ".join(rng.sample(words, 3)))
+    return queries
+
+
+def latency_summary(latencies: List[float]) -> Dict[str, float]:
+    values = np.array(latencies) * 1000
+    summary = {
+        f"p{p}_ms": round(float(v), 3)
+        for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))
+    }
+    summary["mean_ms"] = round(float(values.mean()), 3)
+    summary["max_ms"] = round(float(values.max()), 3)
+    return summary
+
+
+def run_one(size: int, n_queries: int, seed: int) -> Dict[str, Any]:
+    """One corpus size, run from inside a scratch directory"""
+    from constants import constants as c
+    from benchmarks.synthetic_corpus import generate
+    from ir_core.postitional_index import build_positional_index
+    from ir_core.tfidf_index import build_tfidf_index
+    from ir_core.bm25_index import build_bm25_index
+    from ir_core.index_service import publish_generation
+    from ir_core import index_manager
+    from ir_core.index_manager import search
+
+    c.DATA_PATH.mkdir(exist_ok=True)
+    result: Dict[str, Any] = {"size": size}
+    docs: List[Dict[str, Any]] = []
+    result["generate_s"] = round(timed(lambda: docs.extend(generate(size, seed))), 3)
+    with open(c.INDEX_FILE_PATH, "w") as f:
+        json.dump(docs, f)
+    result["peak_rss_mb"] = {"corpus": round(peak_rss_mb(), 1)}
+
+    build_s = {}
+    for name, build in (
+        ("positional", build_positional_index),
+        ("tfidf", build_tfidf_index),
+        ("bm25", build_bm25_index),
+    ):
+        build_s[name] = round(timed(lambda: build(docs)), 3)
+        # Cumulative: the process high-water mark once this index is built
+        result["peak_rss_mb"][name] = round(peak_rss_mb(), 1)
+    publish_generation()
+    result["build_s"] = build_s
+    result["disk_bytes"] = {
+        "publications": disk_usage([c.INDEX_FILE_PATH]),
+        "positional": disk_usage(
+            [
+                c.SEGMENTS_PATH,
+                c.INDEX_FILE_POSITIONAL_DICT,
+                c.INDEX_FILE_POSITIONAL_POSTINGS,
+            ]
+        ),
+        "tfidf": disk_usage([c.TFIDF_MATRIX_FILE, c.TFIDF_MODEL_FILE]),
+        "bm25": disk_usage([c.BM25_INDEX_FILE]),
+    }
+
+    queries = sample_queries(docs, n_queries, seed)
+    del docs
+    result["query_latency"] = {}
+    for engine, engine_queries in queries.items():
+        # The first query pays for lazy imports and loading the snapshot
+        search(engine_queries[0], engine=engine)
+        latencies = []
+        for query in engine_queries[1:]:
+            # Sampled queries repeat, a cache hit is not what is measured here
+            index_manager._query_cache.clear()
+            latencies.append(timed(lambda: search(query, engine=engine)))
+        result["query_latency"][engine] = latency_summary(latencies)
+    result["peak_rss_mb"]["queries"] = round(peak_rss_mb(), 1)
+    return result
+
+
+def run_size(size: int, n_queries: int, seed: int) -> Dict[str, Any]:
+    env = {**os.environ, "PYTHONPATH": str(REPO_ROOT)}
+    with tempfile.TemporaryDirectory(prefix="index_scale_") as workdir:
+        output = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.index_scale",
+                "--one",
+                str(size),
+                "--queries",
+                str(n_queries),
+                "--seed",
+                str(seed),
+            ],
+            cwd=workdir,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", type=Path, default=Path("index_scale.json"))
+    parser.add_argument("--one", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.one:
+        print(json.dumps(run_one(args.one, args.queries, args.seed)))
+        return 0
+
+    results = []
+    print(
+        f"{'docs':>9} {'build (s)':>10} {'rss (MB)':>9} {'disk (MB)':>10} "
+        + " ".join(f"{e + ' p50/p99 (ms)':>24}" for e in QUERY_ENGINES)
+    )
+    for size in args.sizes:
+        result = run_size(size, args.queries, args.seed)
+        results.append(result)
+        latency = result["query_latency"]
+        print(
+            f"{size:>9} {sum(result['build_s'].values()):>10.2f} "
+            f"{max(result['peak_rss_mb'].values()):>9.0f} "
+            f"{sum(result['disk_bytes'].values()) / 2**20:>10.1f} "
+            + " ".join(
+                f"{latency[e]['p50_ms']:>11.2f}/{latency[e]['p99_ms']:<12.2f}"
+                for e in QUERY_ENGINES
+            )
+        )
+
+    with open(args.output, "w") as f:
+        json.dump(
+            {
+                "commit": commit(),
+                "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "cpus": os.cpu_count(),
+                "seed": args.seed,
+                "results": results,
+            },
+            f,
+            indent=2,
+        )
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""
+Load test a running search service: throughput and tail latency.
+
+    python -m ir_service.server &
+    python -m benchmarks.load_test [--url http://127.0.0.1:8888]
+        [--concurrency 16] [--requests 2000] [--batch 0] [--json load.json]
+
+Queries are the qrels queries unless --queries-file (one per line) is given.
+--batch N sends N queries per request to /search/batch instead of /search.
+"""
+
+import sys
+import json
+import time
+import asyncio
+import argparse
+import itertools
+
+import numpy as np
+
+from pathlib import Path
+from typing import Dict, List, Any
+from urllib.parse import urlencode
+
+from tornado.httpclient import AsyncHTTPClient, HTTPClientError
+
+from constants.constants import STANDARD_MAPPING_FILE
+from ir_core.evaluation import load_qrels
+
+PERCENTILES = (50, 90, 95, 99)
+WARMUP_REQUESTS = 20
+FALLBACK_QUERIES = [
+    "machine learning",
+    "neural network",
+    '"deep learning"',
+    "data mining",
+    "optimisation",
+    "fluid dynamics NEAR/3 simulation",
+    "climate",
+    "graph theory",
+]
+
+
+def load_queries(path: Path) -> List[str]:
+    if path:
+        with open(path) as f:
+            return [line.strip() for line in f if line.strip()]
+    return list(load_qrels(STANDARD_MAPPING_FILE)) or FALLBACK_QUERIES
+
+
+def make_requests(
+    url: str, queries: List[str], n: int, batch: int, k: int, engine: str
+) -> List[Dict[str, Any]]:
+    cycle = itertools.cycle(queries)
+    if not batch:
+        return [
+            {
+                "request": f"{url}/search?"
+                + urlencode({"q": next(cycle), "k": k, "engine": engine})
+            }
+            for _ in range(n)
+        ]
+    return [
+        {
+            "request": f"{url}/search/batch",
+            "method": "POST",
+            "body": json.dumps(
+                {
+                    "queries": list(itertools.islice(cycle, batch)),
+                    "k": k,
+                    "engine": engine,
+                }
+            ),
+            "headers": {"Content-Type": "application/json"},
+        }
+        for _ in range(n)
+    ]
+
+
+async def run_load(requests: List[Dict[str, Any]], concurrency: int) -> Dict[str, Any]:
+    client = AsyncHTTPClient(max_clients=concurrency)
+    pending = iter(requests)
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+
+    async def worker() -> None:
+        for request in pending:
+            started = time.perf_counter()
+            try:
+                await client.fetch(**request, request_timeout=60)
+                latencies.append(time.perf_counter() - started)
+            except (HTTPClientError, OSError) as e:
+                errors[str(e)] = errors.get(str(e), 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+    return {"elapsed_s": elapsed, "latencies": latencies, "errors": errors}
+
+
+def summarize(run: Dict[str, Any], batch: int, concurrency: int) -> Dict[str, Any]:
+    latencies = np.array(run["latencies"]) * 1000
+    ok = len(latencies)
+    summary = {
+        "concurrency": concurrency,
+        "batch": batch,
+        "requests": ok + sum(run["errors"].values()),
+        "errors": run["errors"],
+        "elapsed_s": round(run["elapsed_s"], 3),
+        "requests_per_s": round(ok / run["elapsed_s"], 1),
+        "queries_per_s": round(ok * max(batch, 1) / run["elapsed_s"], 1),
+    }
+    if ok:
+        summary.update(
+            {
+                f"p{p}_ms": round(float(v), 3)
+                for p, v in zip(PERCENTILES, np.percentile(latencies, PERCENTILES))
+            }
+        )
+        summary["max_ms"] = round(float(latencies.max()), 3)
+    return summary
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://127.0.0.1:8888")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=0)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--engine", default="auto")
+    parser.add_argument("--queries-file", type=Path)
+    parser.add_argument("--json", type=Path, help="also write the summary here")
+    args = parser.parse_args()
+
+    url = args.url.rstrip("/")
+    queries = load_queries(args.queries_file)
+    warmup = make_requests(
+        url, queries, WARMUP_REQUESTS, args.batch, args.k, args.engine
+    )
+    requests = make_requests(
+        url, queries, args.requests, args.batch, args.k, args.engine
+    )
+
+    asyncio.run(run_load(warmup, args.concurrency))
+    print(
+        f"{args.requests} requests to {url} at concurrency {args.concurrency}"
+        + (f", {args.batch} queries each" if args.batch else "")
+        + " ..."
+    )
+    summary = summarize(
+        asyncio.run(run_load(requests, args.concurrency)),
+        args.batch,
+        args.concurrency,
+    )
+    for key, value in summary.items():
+        print(f"{key:>16}: {value}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+    return 1 if summary["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+Phrase matching benchmark: legacy nested scan vs the linear positional join.
+
+    python -m benchmarks.phrase_search
+"""
+
+import random
+import time
+
+from collections import defaultdict
+from typing import Dict, List
+
+from ir_core.postitional_index import phrase_search
+
+VOCAB_SIZE = 50
+DOCS = 20
+
+
+def legacy_phrase_search(postings: Dict, phrase: str, window: int = 5) -> int:
+    """The pre-engine algorithm, kept here only as the baseline"""
+    tokens = phrase.split()
+    candidate_docs = list(postings.get(tokens[0], {}).keys())
+    for token in tokens[1:]:
+        candidate_docs = sorted(set(candidate_docs) & set(postings.get(token, {})))
+    total = 0
+    for doc_id in candidate_docs:
+        doc_post_lists = [postings[token][doc_id] for token in tokens]
+        for start_pos in doc_post_lists[0]:
+            for i in range(1, len(tokens)):
+                if not [
+                    p for p in doc_post_lists[i] if abs(p - (start_pos + i)) <= window
+                ]:
+                    break
+            else:
+                total += 1
+    return total
+
+
+def synthetic_postings(
+    doc_length: int, seed: int = 7
+) -> Dict[str, Dict[int, List[int]]]:
+    rng = random.Random(seed)
+    vocab = [f"t{i}" for i in range(VOCAB_SIZE)]
+    postings: Dict[str, Dict[int, List[int]]] = defaultdict(lambda: defaultdict(list))
+    for doc_id in range(DOCS):
+        for pos in range(doc_length):
+            postings[rng.choice(vocab)][doc_id].append(pos)
+    return {term: dict(docs) for term, docs in postings.items()}
+
+
+def timed(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    docs = [{"title": f"doc {i}"} for i in range(DOCS)]
+    print(
+        f"{'doc length':>10} {'phrase':>6} {'legacy (s)':>12} {'engine (s)':>12}"
+        f" {'speedup':>8}"
+    )
+    for doc_length in (1_000, 5_000, 20_000):
+        postings = synthetic_postings(doc_length)
+        for phrase_length in (2, 4, 8):
+            phrase = " ".join(f"t{i}" for i in range(phrase_length))
+            legacy = timed(lambda: legacy_phrase_search(postings, phrase))
+            engine = timed(lambda: phrase_search(postings, phrase, docs, top_k=DOCS))
+            print(
+                f"{doc_length:>10} {phrase_length:>6} {legacy:>12.4f} "
+                f"{engine:>12.4f} {legacy / engine:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Deterministic synthetic publications in the crawler's record schema.
+
+    python -m benchmarks.synthetic_corpus 100000 > publications.json
+
+Words follow a Zipf distribution over a generated vocabulary, so postings
+lengths look like a real corpus: a few very common terms, a long tail.
+"""
+
+import sys
+import json
+import random
+import itertools
+
+from functools import lru_cache
+from typing import Dict, Any, Iterator, List
+
+from ir_core.preprocessors.analyzer import analyze
+
+VOCAB_SIZE = 50_000
+ZIPF_EXPONENT = 1.1
+AUTHOR_POOL = 5_000
+SYLLABLES = [c + v for c in "bcdfghklmnprstvz" for v in "aeiou"]
+PORTAL_URL = "https://pureportal.coventry.ac.uk"
+
+
+def vocabulary(size: int, rng: random.Random) -> List[str]:
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+    return sorted(words)
+
+
+@lru_cache(maxsize=None)
+def analyzed(word: str) -> str:
+    return " ".join(analyze(word))
+
+
+class CorpusGenerator:
+    def __init__(self, seed: int = 7, vocab_size: int = VOCAB_SIZE):
+        self.rng = random.Random(seed)
+        self.vocab = vocabulary(vocab_size, self.rng)
+        self.rng.shuffle(self.vocab)
+        weights = [1 / rank**ZIPF_EXPONENT for rank in range(1, vocab_size + 1)]
+        self.cum_weights = list(itertools.accumulate(weights))
+        self.authors = [
+            f"{self.word().title()} {self.word().title()}" for _ in range(AUTHOR_POOL)
+        ]
+
+    def word(self) -> str:
+        return self.rng.choice(self.vocab)
+
+    def words(self, n: int) -> List[str]:
+        return self.rng.choices(self.vocab, cum_weights=self.cum_weights, k=n)
+
+    def publication(self, i: int) -> Dict[str, Any]:
+        rng = self.rng
+        title = self.words(rng.randint(5, 14))
+        abstract = self.words(rng.randint(80, 250))
+        keywords = self.words(rng.randint(0, 6))
+        fingerprints = self.words(rng.randint(0, 10))
+        authors = rng.sample(self.authors, rng.randint(1, 6))
+        year = str(rng.randint(1995, 2025))
+        slug = "-".join(title[:6]) + f"-{i}"
+        pub = {
+            "title": " ".join(title).capitalize(),
+            "pub_link": f"{PORTAL_URL}/en/publications/{slug}",
+            "authors": authors,
+            "author_profiles": [
+                f"{PORTAL_URL}/en/persons/{a.lower().replace(' ', '-')}/"
+                for a in authors[:2]
+            ],
+            "year": f"1 Jan {year}",
+            "abstract": " ".join(abstract).capitalize() + ".",
+            "doi": f"https://doi.org/10.{1000 + i % 9000}/syn.{i}" if i % 3 else "",
+            "pdf_link": "",
+            "keywords": ",".join(keywords),
+            "fingerprints": ",".join(w.title() for w in fingerprints),
+            "last_crawled": "2025-01-01 00:00",
+            "year_only": year,
+        }
+        # Same token stream as analyze_publication, memoized per word
+        text = title + " ".join(authors).lower().split() + pub["year"].lower().split()
+        text += abstract + keywords + fingerprints
+        pub["content"] = " ".join(t for t in map(analyzed, text) if t)
+        return pub
+
+    def publications(self, n: int) -> Iterator[Dict[str, Any]]:
+        for i in range(n):
+            yield self.publication(i)
+
+
+def generate(n: int, seed: int = 7) -> List[Dict[str, Any]]:
+    return list(CorpusGenerator(seed).publications(n))
+
+
+if __name__ == "__main__":
+    json.dump(generate(int(sys.argv[1]) if len(sys.argv) > 1 else 1000), sys.stdout)
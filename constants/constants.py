@@ -3,4 +3,19 @@ from pathlib import Path
 DATA_PATH = Path("data")
 INDEX_FILE_PATH = DATA_PATH / "publications.json"
 INDEX_FILE_POSITIONAL = DATA_PATH / "positional_index.json"
-STANDARD_MAPPING_FILE = DATA_PATH / "docs_relevance_mapping.json"
\ No newline at end of file
+STANDARD_MAPPING_FILE = DATA_PATH / "docs_relevance_mapping.json"
+TFIDF_MATRIX_FILE = DATA_PATH / "tfidf_matrix.npz"
+TFIDF_MODEL_FILE = DATA_PATH / "tfidf_model.npz"
+INDEX_FILE_POSITIONAL_DICT = DATA_PATH / "positional_index.dict"
+INDEX_FILE_POSITIONAL_POSTINGS = DATA_PATH / "positional_index.postings"
+INDEX_GENERATION_FILE = DATA_PATH / "index_generation"
+SEGMENTS_PATH = DATA_PATH / "segments"
+SEGMENT_MANIFEST_FILE = SEGMENTS_PATH / "manifest.json"
+SEGMENT_LOCK_FILE = SEGMENTS_PATH / "manifest.lock"
+BM25_INDEX_FILE = DATA_PATH / "bm25_index.npz"
+CRAWL_STATE_FILE = DATA_PATH / "crawl_state.json"
+CRAWL_JOURNAL_FILE = DATA_PATH / "crawl_journal.jsonl"
+CRAWL_CHECKPOINT_FILE = DATA_PATH / "crawl_checkpoint.json"
+PAGE_ARCHIVE_PATH = DATA_PATH / "page_archive"
+CORPUS_STATS_FILE = DATA_PATH / "corpus_stats.json"
+SEARCH_METRICS_FILE = DATA_PATH / "search_metrics.jsonl"
@@ -0,0 +1,187 @@
+import numpy as np
+
+from collections import Counter
+from typing import List, Dict, Any, Optional, Tuple
+
+from ir_core.topk import top_k_dense, wand_top_k
+from ir_core.timing import span
+from ir_core.preprocessors.analyzer import (
+    ANALYZER_VERSION,
+    analyze,
+    document_tokens,
+)
+from constants.constants import INDEX_FILE_PATH, BM25_INDEX_FILE
+
+# BM25F fields and their weights, title matches count double
+FIELDS = ("title", "content")
+FIELD_WEIGHTS = np.array([2.0, 1.0], dtype=np.float32)
+K1 = 1.2
+B = 0.75
+# Above this many docs, WAND beats building a dense score vector
+DENSE_SCORING_LIMIT = 50_000
+
+
+def _field_tokens(doc: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+    return analyze(doc.get("title", "")), document_tokens(doc)
+
+
+def build_bm25_index(docs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Per-field term frequencies and document lengths, laid out term by term
+    (CSR style) so a query term is one contiguous slice.
+    """
+    n_fields = len(FIELDS)
+    doc_len = np.zeros((len(docs), n_fields), dtype=np.float32)
+    term_docs: Dict[str, List[Tuple[int, int, int]]] = {}
+    for doc_id, doc in enumerate(docs):
+        field_counts = [Counter(tokens) for tokens in _field_tokens(doc)]
+        for f, counts in enumerate(field_counts):
+            doc_len[doc_id, f] = sum(counts.values())
+        for term in set(field_counts[0]) | set(field_counts[1]):
+            term_docs.setdefault(term, []).append(
+                (doc_id, field_counts[0][term], field_counts[1][term])
+            )
+
+    terms = sorted(term_docs)
+    term_ptr = np.zeros(len(terms) + 1, dtype=np.int64)
+    for i, term in enumerate(terms):
+        term_ptr[i + 1] = term_ptr[i] + len(term_docs[term])
+    post_docs = np.empty(term_ptr[-1], dtype=np.int32)
+    post_tf = np.empty((term_ptr[-1], n_fields), dtype=np.float32)
+    for i, term in enumerate(terms):
+        rows = np.array(term_docs[term], dtype=np.int64)
+        post_docs[term_ptr[i] : term_ptr[i + 1]] = rows[:, 0]
+        post_tf[term_ptr[i] : term_ptr[i + 1]] = rows[:, 1:]
+
+    n_docs = max(len(docs), 1)
+    doc_freq = np.diff(term_ptr).astype(np.float32)
+    idf = np.log1p((n_docs - doc_freq + 0.5) / (doc_freq + 0.5)).astype(np.float32)
+
+    np.savez_compressed(
+        BM25_INDEX_FILE,
+        terms=np.array(terms, dtype=str),
+        term_ptr=term_ptr,
+        post_docs=post_docs,
+        post_tf=post_tf,
+        doc_len=doc_len,
+        idf=idf,
+        analyzer=ANALYZER_VERSION,
+    )
+    return _prepare(terms, term_ptr, post_docs, post_tf, doc_len, idf)
+
+
+def _prepare(terms, term_ptr, post_docs, post_tf, doc_len, idf) -> Dict[str, Any]:
+    """Fold lengths, field weights and IDF into one impact score per posting"""
+    avg_len = np.maximum(doc_len.mean(axis=0), 1.0) if len(doc_len) else 1.0
+    field_norm = (1 - B) + B * doc_len / avg_len
+    if len(post_docs):
+        tf = (post_tf / field_norm[post_docs]) @ FIELD_WEIGHTS
+        term_idf = np.repeat(idf, np.diff(term_ptr))
+        impacts = (term_idf * tf * (K1 + 1) / (K1 + tf)).astype(np.float32)
+        # Per-term upper bound of a single posting's contribution
+        max_impact = np.maximum.reduceat(impacts, term_ptr[:-1])
+    else:
+        impacts = np.zeros(0, dtype=np.float32)
+        max_impact = np.zeros(0, dtype=np.float32)
+    return {
+        "vocabulary": {term: i for i, term in enumerate(terms)},
+        "term_ptr": term_ptr,
+        "post_docs": post_docs,
+        "impacts": impacts,
+        "max_impact": max_impact,
+        "idf": idf,
+        "n_docs": len(doc_len),
+    }
+
+
+def bm25_index_is_stale() -> bool:
+    """Artifact missing, from an older analyzer or older than the publications"""
+    if not BM25_INDEX_FILE.exists():
+        return True
+    with np.load(BM25_INDEX_FILE) as data:
+        if "analyzer" not in data or int(data["analyzer"]) != ANALYZER_VERSION:
+            return True
+    if not INDEX_FILE_PATH.exists():
+        return False
+    return BM25_INDEX_FILE.stat().st_mtime < INDEX_FILE_PATH.stat().st_mtime
+
+
+def load_bm25_index() -> Optional[Dict[str, Any]]:
+    if not BM25_INDEX_FILE.exists():
+        return None
+    with np.load(BM25_INDEX_FILE) as data:
+        return _prepare(
+            list(data["terms"]),
+            data["term_ptr"],
+            data["post_docs"],
+            data["post_tf"],
+            data["doc_len"],
+            data["idf"],
+        )
+
+
+def bm25_scores(index: Dict[str, Any], tokens: List[str]) -> np.ndarray:
+    """Dense BM25F score vector over all docs"""
+    scores = np.zeros(index["n_docs"], dtype=np.float32)
+    for term, query_tf in Counter(tokens).items():
+        i = index["vocabulary"].get(term)
+        if i is None:
+            continue
+        start, end = index["term_ptr"][i], index["term_ptr"][i + 1]
+        # Doc ids are unique within a term, so fancy-index addition is safe
+        scores[index["post_docs"][start:end]] += query_tf * index["impacts"][start:end]
+    return scores
+
+
+def bm25_top_k(
+    index: Dict[str, Any], tokens: List[str], top_k: int = 10
+) -> List[Tuple[float, int]]:
+    """(score, doc_id) of the best docs, pruned with WAND on large corpora"""
+    if index["n_docs"] <= DENSE_SCORING_LIMIT:
+        scores = bm25_scores(index, tokens)
+        return [
+            (float(scores[idx]), int(idx))
+            for idx in top_k_dense(scores, top_k)
+            if scores[idx] > 0
+        ]
+
+    # Views of each term's slice, impacts are scaled only where they are used
+    term_postings = []
+    query_tfs = []
+    for term, query_tf in Counter(tokens).items():
+        i = index["vocabulary"].get(term)
+        if i is None:
+            continue
+        start, end = index["term_ptr"][i], index["term_ptr"][i + 1]
+        term_postings.append(
+            (
+                index["post_docs"][start:end],
+                index["impacts"][start:end],
+                float(query_tf * index["max_impact"][i]),
+            )
+        )
+        query_tfs.append(float(query_tf))
+
+    if len(term_postings) == 1:
+        # A single term ranks docs by its impacts, select straight from the slice
+        doc_ids, impacts, _ = term_postings[0]
+        return [
+            (query_tfs[0] * float(impacts[i]), int(doc_ids[i]))
+            for i in top_k_dense(impacts, top_k)
+        ]
+    # Memoryviews copy nothing and index to Python numbers, unlike the arrays
+    return wand_top_k(
+        [(memoryview(d), memoryview(s), bound) for d, s, bound in term_postings],
+        top_k,
+        query_tfs,
+    )
+
+
+def bm25_search(
+    index: Dict[str, Any], query: str, docs: List[Dict], top_k: int = 10
+) -> List[Dict]:
+    """Rank docs with BM25F, query is already preprocessed"""
+    with span("scoring"):
+        top = bm25_top_k(index, query.split(), top_k)
+    with span("materialize"):
+        return [{**docs[doc_id], "relevancy_score": score} for score, doc_id in top]
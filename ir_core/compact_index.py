@@ -0,0 +1,241 @@
+import os
+import json
+import mmap
+
+from bisect import bisect_left
+from collections import OrderedDict
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Dict, List, Iterator, Tuple
+
+from constants.constants import (
+    INDEX_FILE_POSITIONAL,
+    INDEX_FILE_POSITIONAL_DICT,
+    INDEX_FILE_POSITIONAL_POSTINGS,
+)
+
+MAGIC = b"PIDX"
+VERSION = 2
+# Terms whose decoded postings stay cached, shared by the segmented index
+DECODED_CACHE_SIZE = 1024
+
+# Binary positional index
+#
+# Dictionary file: MAGIC, version byte, varint term count, then for each term
+# (sorted) its utf-8 bytes, document frequency, postings offset (delta from
+# the previous term), postings length and, since version 2, the highest
+# within-document term frequency (a score upper bound), all varint encoded.
+#
+# Postings file: for each document of a term, the doc id gap, the number of
+# positions and the position gaps, all varint encoded.
+
+
+def encode_varint(value: int, out: bytearray) -> None:
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decode_varint(buf, pos: int) -> Tuple[int, int]:
+    """Return (value, next position)"""
+    result = shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def encode_postings(doc_postings: Dict[int, List[int]]) -> bytes:
+    out = bytearray()
+    prev_doc = 0
+    for doc_id in sorted(doc_postings, key=int):
+        doc_id_int = int(doc_id)
+        positions = sorted(doc_postings[doc_id])
+        encode_varint(doc_id_int - prev_doc, out)
+        encode_varint(len(positions), out)
+        prev_pos = 0
+        for pos in positions:
+            encode_varint(pos - prev_pos, out)
+            prev_pos = pos
+        prev_doc = doc_id_int
+    return bytes(out)
+
+
+def decode_postings(buf, start: int, end: int) -> Dict[int, List[int]]:
+    postings: Dict[int, List[int]] = {}
+    pos = start
+    doc_id = 0
+    while pos < end:
+        gap, pos = decode_varint(buf, pos)
+        doc_id += gap
+        count, pos = decode_varint(buf, pos)
+        positions = []
+        cur = 0
+        for _ in range(count):
+            gap, pos = decode_varint(buf, pos)
+            cur += gap
+            positions.append(cur)
+        postings[doc_id] = positions
+    return postings
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def write_compact_index(
+    postings: Dict[str, Dict[int, List[int]]],
+    dict_path: Path = INDEX_FILE_POSITIONAL_DICT,
+    postings_path: Path = INDEX_FILE_POSITIONAL_POSTINGS,
+) -> None:
+    """Serialize term -> doc -> positions into the dictionary/postings pair"""
+    dictionary = bytearray(MAGIC)
+    dictionary.append(VERSION)
+    encode_varint(len(postings), dictionary)
+    data = bytearray()
+    prev_offset = 0
+    for term in sorted(postings):
+        encoded = encode_postings(postings[term])
+        term_bytes = term.encode("utf-8")
+        encode_varint(len(term_bytes), dictionary)
+        dictionary.extend(term_bytes)
+        encode_varint(len(postings[term]), dictionary)
+        encode_varint(len(data) - prev_offset, dictionary)
+        encode_varint(len(encoded), dictionary)
+        encode_varint(max(map(len, postings[term].values()), default=0), dictionary)
+        prev_offset = len(data)
+        data.extend(encoded)
+
+    # Postings first so a reader never sees a dictionary pointing past the end
+    _atomic_write(postings_path, bytes(data))
+    _atomic_write(dict_path, bytes(dictionary))
+
+
+class CompactPositionalIndex(Mapping):
+    """
+    Read-only term -> {doc_id: positions} mapping over the binary index.
+    Postings are decoded from the mmap only when a term is looked up.
+    """
+
+    def __init__(
+        self,
+        dict_path: Path = INDEX_FILE_POSITIONAL_DICT,
+        postings_path: Path = INDEX_FILE_POSITIONAL_POSTINGS,
+    ):
+        with open(dict_path, "rb") as f:
+            raw = f.read()
+        if raw[:4] != MAGIC or raw[4] not in (1, VERSION):
+            raise ValueError(f"Unsupported positional index format: {dict_path}")
+        version = raw[4]
+
+        count, pos = decode_varint(raw, 5)
+        self._terms: List[str] = []
+        self._doc_freqs: List[int] = []
+        self._offsets: List[int] = []
+        self._lengths: List[int] = []
+        # Version 1 files carry no bound, it is filled in on first decode
+        self._max_tfs: List[int] = []
+        offset = 0
+        for _ in range(count):
+            size, pos = decode_varint(raw, pos)
+            self._terms.append(raw[pos : pos + size].decode("utf-8"))
+            pos += size
+            doc_freq, pos = decode_varint(raw, pos)
+            delta, pos = decode_varint(raw, pos)
+            length, pos = decode_varint(raw, pos)
+            max_tf = 0
+            if version >= 2:
+                max_tf, pos = decode_varint(raw, pos)
+            offset += delta
+            self._doc_freqs.append(doc_freq)
+            self._offsets.append(offset)
+            self._lengths.append(length)
+            self._max_tfs.append(max_tf)
+
+        self._file = open(postings_path, "rb")
+        if os.fstat(self._file.fileno()).st_size:
+            self._buf = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._buf = b""
+        self._decoded: OrderedDict[str, Dict[int, List[int]]] = OrderedDict()
+
+    def _term_slot(self, term: str) -> int:
+        i = bisect_left(self._terms, term)
+        if i < len(self._terms) and self._terms[i] == term:
+            return i
+        return -1
+
+    def __getitem__(self, term: str) -> Dict[int, List[int]]:
+        cached = self._decoded.get(term)
+        if cached is not None:
+            self._decoded.move_to_end(term)
+            return cached
+        i = self._term_slot(term)
+        if i < 0:
+            raise KeyError(term)
+        start = self._offsets[i]
+        postings = decode_postings(self._buf, start, start + self._lengths[i])
+        self._decoded[term] = postings
+        if len(self._decoded) > DECODED_CACHE_SIZE:
+            self._decoded.popitem(last=False)
+        return postings
+
+    def __contains__(self, term) -> bool:
+        return self._term_slot(term) >= 0
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._terms)
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def doc_freq(self, term: str) -> int:
+        i = self._term_slot(term)
+        return self._doc_freqs[i] if i >= 0 else 0
+
+    def max_tf(self, term: str) -> int:
+        """Highest frequency of the term in any single document"""
+        i = self._term_slot(term)
+        if i < 0:
+            return 0
+        if not self._max_tfs[i]:
+            self._max_tfs[i] = max(map(len, self[term].values()), default=0)
+        return self._max_tfs[i]
+
+    def close(self) -> None:
+        if isinstance(self._buf, mmap.mmap):
+            self._buf.close()
+        self._file.close()
+
+
+def compact_index_exists() -> bool:
+    return (
+        INDEX_FILE_POSITIONAL_DICT.exists() and INDEX_FILE_POSITIONAL_POSTINGS.exists()
+    )
+
+
+def convert_json_index(json_path: Path = INDEX_FILE_POSITIONAL) -> None:
+    """Convert the legacy positional_index.json into the binary format"""
+    with open(json_path) as f:
+        postings = json.load(f)
+    write_compact_index(
+        {
+            term: {int(doc_id): positions for doc_id, positions in docs.items()}
+            for term, docs in postings.items()
+        }
+    )
+
+
+if __name__ == "__main__":
+    convert_json_index()
+    print(
+        f"Converted {INDEX_FILE_POSITIONAL} -> "
+        f"{INDEX_FILE_POSITIONAL_DICT}, {INDEX_FILE_POSITIONAL_POSTINGS}"
+    )
@@ -0,0 +1,86 @@
+import json
+import threading
+
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Dict, Any, Iterator, Tuple
+
+from constants.constants import INDEX_FILE_PATH
+from ir_core.segment_index import doc_key
+
+# Characters of publications.json decoded at a time
+READ_CHUNK = 1 << 16
+SEPARATORS = " \t\r\n,[]"
+
+
+def iter_corpus(path: Path) -> Iterator[Tuple[int, int, Dict[str, Any]]]:
+    """
+    Stream the publications of a JSON array file as (byte offset, byte
+    length, publication), holding one chunk and one record at a time.
+    """
+    decoder = json.JSONDecoder()
+    # No newline translation, offsets must count the bytes on disk (\r\n too)
+    with open(path, encoding="utf-8", newline="") as f:
+        buffer = ""
+        offset = 0  # byte offset of buffer[0]
+        eof = False
+        while True:
+            pos = 0
+            while pos < len(buffer) and buffer[pos] in SEPARATORS:
+                pos += 1
+            try:
+                if pos == len(buffer):
+                    raise json.JSONDecodeError("Need more data", buffer, pos)
+                pub, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    if buffer[pos:].strip(SEPARATORS):
+                        raise
+                    return
+                chunk = f.read(READ_CHUNK)
+                eof = not chunk
+                buffer += chunk
+                continue
+            start = offset + len(buffer[:pos].encode("utf-8"))
+            length = len(buffer[pos:end].encode("utf-8"))
+            yield start, length, pub
+            offset = start + length
+            buffer = buffer[end:]
+
+
+class CorpusFile(Mapping):
+    """
+    doc key -> publication of a publications.json, read from disk on access.
+    Only keys and offsets are held in memory. The file is opened up front,
+    so the corpus stays readable after a crawl replaces publications.json.
+    """
+
+    def __init__(self, path: Path = INDEX_FILE_PATH):
+        self._offsets: Dict[str, Tuple[int, int]] = {}
+        self._file = None
+        self._lock = threading.Lock()
+        if path.exists():
+            self._file = open(path, "rb")
+            for start, length, pub in iter_corpus(path):
+                self._offsets[doc_key(pub)] = (start, length)
+
+    def __getitem__(self, key: str) -> Dict[str, Any]:
+        start, length = self._offsets[key]
+        with self._lock:
+            self._file.seek(start)
+            data = self._file.read(length)
+        return json.loads(data)
+
+    def __contains__(self, key) -> bool:
+        return key in self._offsets
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._offsets)
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,74 @@
+import os
+import json
+import math
+
+from collections import Counter
+from typing import List, Dict, Any, Optional
+
+from constants.constants import CORPUS_STATS_FILE
+from ir_core.preprocessors.analyzer import document_tokens
+
+TOP_TERMS = 20
+TOP_AUTHORS = 20
+# Authors counted per publication, long consortium lists would dominate
+AUTHORS_PER_PUB = 10
+
+
+def top_terms(docs: List[Dict[str, Any]], n: int = TOP_TERMS) -> List[List[Any]]:
+    """
+    Most frequent terms and bigrams of the corpus, scored as a TF-IDF fit
+    over the whole corpus as one document would: counts L2-normalised
+    over the top `n`.
+    """
+    counts = Counter()
+    for doc in docs:
+        tokens = document_tokens(doc)
+        counts.update(tokens)
+        counts.update(" ".join(pair) for pair in zip(tokens, tokens[1:]))
+    top = counts.most_common(n)
+    norm = math.sqrt(sum(count * count for _, count in top)) or 1.0
+    return [[term, round(count / norm, 4)] for term, count in top]
+
+
+def build_corpus_stats(docs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Every aggregate the Summary page shows, computed once at index time"""
+    authors = set()
+    author_pubs = Counter()
+    year_counts = Counter()
+    total_authors = 0
+    for pub in docs:
+        pub_authors = pub.get("authors", [])
+        authors.update(pub_authors)
+        total_authors += len(pub_authors)
+        author_pubs.update(pub_authors[:AUTHORS_PER_PUB])
+        year = pub.get("year_only", "N/A")
+        if year and year != "N/A":
+            year_counts[str(year)] += 1
+    return {
+        "total_publications": len(docs),
+        "unique_authors": len(authors),
+        "avg_authors": round(total_authors / len(docs), 1) if docs else 0.0,
+        "top_authors": author_pubs.most_common(TOP_AUTHORS),
+        "top_terms": top_terms(docs),
+        "years": dict(sorted(year_counts.items())),
+    }
+
+
+def save_corpus_stats(docs: List[Dict[str, Any]], generation: str) -> Dict[str, Any]:
+    """Stats of `docs`, stamped with the index generation they were built from"""
+    stats = build_corpus_stats(docs)
+    stats["generation"] = generation
+    tmp_path = CORPUS_STATS_FILE.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(stats, f, indent=2)
+    os.replace(tmp_path, CORPUS_STATS_FILE)
+    return stats
+
+
+def load_corpus_stats(generation: str) -> Optional[Dict[str, Any]]:
+    """Saved stats, None when missing or built for another generation"""
+    if not CORPUS_STATS_FILE.exists():
+        return None
+    with open(CORPUS_STATS_FILE) as f:
+        stats = json.load(f)
+    return stats if stats.get("generation") == generation else None
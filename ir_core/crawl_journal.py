@@ -0,0 +1,135 @@
+import os
+import json
+import textwrap
+import threading
+
+from pathlib import Path
+from typing import Dict, Any, Iterator, Optional, Set
+
+from constants.constants import (
+    CRAWL_CHECKPOINT_FILE,
+    CRAWL_JOURNAL_FILE,
+    INDEX_FILE_PATH,
+)
+from ir_core.dedup import (
+    canonical_indices,
+    canonical_rank,
+    minhash_signature,
+    near_duplicate_clusters,
+)
+
+# Seconds between checkpoints of the crawl position
+CHECKPOINT_INTERVAL = 30
+
+
+class CrawlJournal:
+    """
+    Append-only JSONL log of crawled publications plus a checkpoint of the
+    crawl position. Both survive a crash; a checkpoint on disk means the
+    last crawl did not finish and can be resumed.
+    """
+
+    def __init__(
+        self,
+        journal_path: Path = CRAWL_JOURNAL_FILE,
+        checkpoint_path: Path = CRAWL_CHECKPOINT_FILE,
+    ):
+        self.journal_path = journal_path
+        self.checkpoint_path = checkpoint_path
+        self._file = None
+        self._lock = threading.Lock()
+        self._checkpoint_lock = threading.Lock()
+
+    def start(self, mode: str, resume: bool = True) -> Optional[Dict[str, Any]]:
+        """Open the journal; returns the checkpoint when resuming a `mode` crawl"""
+        checkpoint = None
+        if resume and self.checkpoint_path.exists():
+            with open(self.checkpoint_path) as f:
+                checkpoint = json.load(f)
+            if checkpoint.get("mode") != mode:
+                checkpoint = None
+        if checkpoint is None:
+            self.checkpoint_path.unlink(missing_ok=True)
+            self.journal_path.unlink(missing_ok=True)
+        self._file = open(self.journal_path, "a")
+        return checkpoint
+
+    def append(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        """Journal records in crawl order, skipping a line torn by a crash"""
+        if not self.journal_path.exists():
+            return
+        with open(self.journal_path) as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+    def checkpoint(self, mode: str, position: Dict[str, Any]) -> None:
+        """Persist the crawl position once everything journaled so far is on disk"""
+        with self._checkpoint_lock:
+            with self._lock:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            tmp_path = self.checkpoint_path.with_suffix(".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump({"mode": mode, **position}, f)
+            os.replace(tmp_path, self.checkpoint_path)
+
+    def canonical_positions(self) -> Set[int]:
+        """
+        Journal positions of the records to keep: the first record per link,
+        then one canonical record per cluster of near-duplicates. Only
+        MinHash signatures are held in memory, not the records.
+        """
+        seen_links = set()
+        positions, signatures, ranks = [], [], []
+        for position, record in enumerate(self.records()):
+            pub = record["pub"]
+            if pub["pub_link"] in seen_links:
+                continue
+            seen_links.add(pub["pub_link"])
+            positions.append(position)
+            signatures.append(minhash_signature(pub))
+            ranks.append(canonical_rank(pub))
+        clusters = near_duplicate_clusters(signatures)
+        return {positions[i] for i in canonical_indices(ranks, clusters)}
+
+    def compact(self, path: Path = INDEX_FILE_PATH) -> int:
+        """
+        Stream the journal into the publications snapshot, dropping repeated
+        links and near-duplicate publications, without holding the corpus
+        in memory.
+        """
+        kept = self.canonical_positions()
+        count = 0
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            f.write("[")
+            for position, record in enumerate(self.records()):
+                if position not in kept:
+                    continue
+                pub = record["pub"]
+                f.write(",\n" if count else "\n")
+                f.write(textwrap.indent(json.dumps(pub, indent=2), "  "))
+                count += 1
+            f.write("\n]")
+        os.replace(tmp_path, path)
+        return count
+
+    def finish(self) -> None:
+        """Crawl complete: drop the journal and checkpoint"""
+        self.close()
+        self.checkpoint_path.unlink(missing_ok=True)
+        self.journal_path.unlink(missing_ok=True)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
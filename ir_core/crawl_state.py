@@ -0,0 +1,53 @@
+import os
+import json
+import hashlib
+
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional
+
+from constants.constants import CRAWL_STATE_FILE
+
+# Unchanged-looking publications are still re-fetched after this long
+RECRAWL_AFTER = timedelta(days=30)
+TIME_FORMAT = "%Y-%m-%d %H:%M"
+# Crawl bookkeeping, not part of what the page says
+VOLATILE_FIELDS = ("last_crawled",)
+
+
+def load_crawl_state() -> Dict[str, Dict[str, Any]]:
+    """Per publication URL: hash, last_seen, last_fetched, etag, last_modified"""
+    if not CRAWL_STATE_FILE.exists():
+        return {}
+    with open(CRAWL_STATE_FILE) as f:
+        return json.load(f)
+
+
+def save_crawl_state(state: Dict[str, Dict[str, Any]]) -> None:
+    tmp_path = CRAWL_STATE_FILE.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, CRAWL_STATE_FILE)
+
+
+def publication_hash(pub: Dict[str, Any]) -> str:
+    """Hash of everything extracted from the page"""
+    fields = {k: v for k, v in pub.items() if k not in VOLATILE_FIELDS}
+    return hashlib.sha1(json.dumps(fields, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def is_fresh(entry: Optional[Dict[str, Any]], now: datetime) -> bool:
+    """Fetched recently enough that listing it again does not warrant a fetch"""
+    if not entry or not entry.get("last_fetched"):
+        return False
+    last_fetched = datetime.strptime(entry["last_fetched"], TIME_FORMAT)
+    return now - last_fetched < RECRAWL_AFTER
+
+
+def validators(entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    """Conditional request headers from the stored HTTP validators"""
+    headers = {}
+    if entry and entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry and entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
@@ -3,8 +3,9 @@ import time
 import json
 import logging
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Mapping, Optional, Set
 from pathlib import Path
 from robotexclusionrulesparser import RobotExclusionRulesParser
 from selenium import webdriver
@@ -12,20 +13,48 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.chrome.webdriver import WebDriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from bs4 import BeautifulSoup
-
-from ir_core.index_manager import preprocess
-from utils.util import extract_year
+from selenium.common.exceptions import TimeoutException
+
+from ir_core.crawl_journal import CrawlJournal
+from ir_core.index_manager import build_indexes
+from ir_core.page_archive import PageArchive
+from ir_core.page_parser import (
+    FINGERPRINTS,
+    LISTING,
+    PUBLICATION,
+    fingerprints_url,
+    parse_fingerprints,
+    parse_listing,
+    parse_publication,
+)
+from ir_core.segment_index import doc_key
+from ir_core.rate_limiter import AdaptiveRateLimiter
+from ir_core.preprocessors.analyzer import analyze_publication
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Upper bound on waiting for a page to render, the old fixed sleep
 WAIT_TIME = 5
 DATA_PATH = Path("data")
 DATA_PATH.mkdir(exist_ok=True)
 INDEX_FILE = DATA_PATH / "publications.json"
+# Journal checkpoints only resume a crawl of the same kind
+CRAWL_MODE = "serial_listing"
+
+# Elements whose presence means a page of that kind has rendered
+ORGANISATION_READY = "#page-content .subMenu"
+LISTING_READY = "#main-content .list-results"
+PUBLICATION_READY = ".introduction"
+FINGERPRINTS_READY = ".publication-fingerprints"
+
+HTTP_TIMEOUT = 30
+USER_AGENT = "DigNDigest/1.0 (+academic search crawler)"
+
+# Shared politeness policy for every page load of this process
+RATE_LIMITER = AdaptiveRateLimiter()
+# Fetches fingerprints while the driver loads the publication itself
+FINGERPRINTS_FETCHER = ThreadPoolExecutor(max_workers=1)
 
 unique_publications: set[str] = set()
 
@@ -80,71 +109,155 @@ def remove_consent_overlay(driver):
     )
 
 
-def get_persons_url(driver: WebDriver, base_url: str) -> str:
-    """Navigate to profiles tab"""
-    print("Fetching profiles URL ...")
-    driver.get(base_url)
-    logger.info(f"In {WAIT_TIME} seconds ...")
-    time.sleep(WAIT_TIME)
+def wait_for_document(driver: WebDriver, previous_url: str = None) -> bool:
+    """
+    Wait until navigation away from `previous_url` has loaded a document.
+    Returns False if that took longer than WAIT_TIME.
+    """
+
+    def loaded(d):
+        if previous_url and d.current_url == previous_url:
+            return False
+        return d.execute_script("return document.readyState") == "complete"
+
+    try:
+        WebDriverWait(driver, WAIT_TIME, poll_frequency=0.1).until(loaded)
+        return True
+    except TimeoutException:
+        logger.info(f"Navigation not done after {WAIT_TIME} seconds, continuing")
+        return False
+
+
+def wait_for_page(driver: WebDriver, ready_selector: str = None) -> bool:
+    """
+    Wait until `ready_selector` is present in the loaded document.
+    After WAIT_TIME seconds carry on anyway, as the fixed sleep used to.
+    Rendering time is the browser's, so it is not fed to the rate limiter.
+    """
+    ready = True
+    if ready_selector:
+        try:
+            WebDriverWait(driver, WAIT_TIME, poll_frequency=0.1).until(
+                lambda d: d.find_elements(By.CSS_SELECTOR, ready_selector)
+            )
+        except TimeoutException:
+            logger.info(
+                f"{ready_selector} not rendered after {WAIT_TIME} seconds, continuing"
+            )
+            ready = False
     remove_consent_overlay(driver)
-    # Find the profile link
-    profile_link = driver.find_element(
-        By.CSS_SELECTOR, "#page-content .subMenu a[href*='persons']"
-    )
-    driver.execute_script("arguments[0].click();", profile_link)
-    logger.info(f"In {WAIT_TIME} seconds ...")
-    time.sleep(WAIT_TIME)
-    print(f"Found Profiles url: {driver.current_url}")
-    return driver.current_url
+    return ready
+
+
+def load_page(
+    driver: WebDriver,
+    url: str,
+    ready_selector: str = None,
+    limiter: AdaptiveRateLimiter = RATE_LIMITER,
+) -> bool:
+    """
+    Rate-limited driver.get that returns as soon as the page is usable.
+    Only the navigation itself counts as server latency.
+    """
+    limiter.acquire(url)
+    started = time.monotonic()
+    ok = False
+    try:
+        # Returns once the document has loaded
+        driver.get(url)
+        ok = True
+    finally:
+        limiter.record(url, time.monotonic() - started, ok)
+    return wait_for_page(driver, ready_selector)
+
+
+def click_through(
+    driver: WebDriver,
+    link,
+    ready_selector: str = None,
+    limiter: AdaptiveRateLimiter = RATE_LIMITER,
+) -> bool:
+    """Follow a link through JavaScript, rate-limited like load_page"""
+    url = link.get_attribute("href") or driver.current_url
+    previous_url = driver.current_url
+    limiter.acquire(url)
+    started = time.monotonic()
+    ok = False
+    try:
+        driver.execute_script("arguments[0].click();", link)
+        ok = wait_for_document(driver, previous_url)
+    finally:
+        limiter.record(url, time.monotonic() - started, ok)
+    return wait_for_page(driver, ready_selector)
 
 
 def get_publication_url(driver: WebDriver, base_url: str) -> str:
     """Navigate to publications tab"""
     print("Fetching publications URL ...")
-    driver.get(base_url)
-    logger.info(f"In {WAIT_TIME} seconds ...")
-    time.sleep(WAIT_TIME)
-    remove_consent_overlay(driver)
+    load_page(driver, base_url, ORGANISATION_READY)
     # Find the publication link
     pub_link = driver.find_element(
         By.CSS_SELECTOR, "#page-content .subMenu a[href*='publication']"
     )
-    driver.execute_script("arguments[0].click();", pub_link)
-    logger.info(f"In {WAIT_TIME} seconds ...")
-    time.sleep(WAIT_TIME)
+    click_through(driver, pub_link, LISTING_READY)
     print(f"Found Publication url: {driver.current_url}")
     return driver.current_url
 
 
-def retrieve_keywords(soup: BeautifulSoup) -> str:
-    keywords_elem = soup.select(".keyword-group .relations.keywords span")
-    if keywords_elem:
-        return ",".join(k.get_text(strip=True) for k in keywords_elem)
-    return None
+def archive_page(
+    driver: WebDriver, kind: str, archive: PageArchive = None, url: str = None
+) -> str:
+    """The rendered page, archived for reparsing under `url` or where it ended up"""
+    html = driver.page_source
+    if archive:
+        archive.store(url or driver.current_url, kind, html)
+    return html
 
 
-def retrieve_fingerprints(driver: WebDriver) -> str:
+def retrieve_fingerprints(
+    pub_url: str,
+    archive: PageArchive = None,
+    limiter: AdaptiveRateLimiter = RATE_LIMITER,
+) -> Optional[str]:
+    """
+    Fingerprints of a publication, fetched over plain HTTP from the URL
+    derived from `pub_url`, so the driver never leaves the publication.
+    """
+    url = fingerprints_url(pub_url)
+    logger.info("Retrieving fingerprints ...")
+    limiter.acquire(url)
+    started = time.monotonic()
+    ok = False
     try:
-        fingerprint_link = driver.find_element(
-            By.CSS_SELECTOR, "#page-content .subMenu a[href*='/fingerprints']"
+        resp = requests.get(
+            url, headers={"User-Agent": USER_AGENT}, timeout=HTTP_TIMEOUT
         )
-        driver.execute_script("arguments[0].click();", fingerprint_link)
-        logger.info("Retrieving fingerprints ...")
-        logger.info(f"In {WAIT_TIME} seconds ...")
-        time.sleep(WAIT_TIME)
-
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-        fingerprint_elem = soup.select(
-            ".publication-fingerprints .concept_listing span.concept"
-        )
-        if fingerprint_elem:
-            return ",".join(f.get_text(strip=True) for f in fingerprint_elem)
-    except NoSuchElementException:
+        ok = resp.status_code < 500 and resp.status_code != 429
+    except requests.RequestException as e:
+        logger.warning(f"Error retrieving fingerprints {url}: {e}")
+        return None
+    finally:
+        limiter.record(url, time.monotonic() - started, ok)
+    if resp.status_code != 200:
         print("No fingerprints")
-    return None
+        return None
+    if archive:
+        archive.store(url, FINGERPRINTS, resp.text)
+    return parse_fingerprints(resp.text)
+
+
+def finish_publication(pub_data: Dict[str, Any], fingerprints: str) -> Dict[str, Any]:
+    pub_data["fingerprints"] = fingerprints if fingerprints else ""
+    # Analyzed once here; index builders consume this token stream as is
+    pub_data["content"] = analyze_publication(pub_data)
+    pub_data["last_crawled"] = datetime.now().strftime("%Y-%m-%d %H:%M")
+    logger.info(f"LOGGER: Crawled details: {pub_data['title'][:50]} ... ")
+    return pub_data
 
 
-def crawl_single_publication(driver: WebDriver, pub_url: str) -> Dict[str, Any]:
+def crawl_single_publication(
+    driver: WebDriver, pub_url: str, archive: PageArchive = None
+) -> Dict[str, Any]:
     """Crawl individual publication page for full details"""
     # Check if current publication has already been crawled
     if pub_url in unique_publications:
@@ -152,118 +265,51 @@ def crawl_single_publication(driver: WebDriver, pub_url: str) -> Dict[str, Any]:
         return
 
     print(f"Crawling individual page {pub_url}")
-    driver.get(pub_url)
-    logger.info(f"In {WAIT_TIME} seconds ...")
-    time.sleep(WAIT_TIME)
-    remove_consent_overlay(driver)
+    fingerprints = FINGERPRINTS_FETCHER.submit(retrieve_fingerprints, pub_url, archive)
+    load_page(driver, pub_url, PUBLICATION_READY)
 
-    soup = BeautifulSoup(driver.page_source, "html.parser")
-    pub_data = {
-        "title": "",
-        "pub_link": pub_url,
-        "authors": [],
-        "author_profiles": [],
-        "year": "",
-        "abstract": "",
-        "doi": "",
-        "pdf_link": "",
-        "keywords": "",
-        "fingerprints": "",
-        "content": "",
-        "last_crawled": "",
-        "year_only": "",
-    }
-
-    title_elem = soup.find("h1", id="firstheading") or soup.select_one("h1")
-    pub_data["title"] = title_elem.get_text(strip=True) if title_elem else "No Title"
-    author_links = soup.select(".introduction p a[href*='/en/persons']")
-
-    # Verify if there is at least one member author
-    if not author_links:
-        return None
-
-    for a in author_links:
-        name = a.get_text(strip=True)
-        if name and len(name) > 1:
-            pub_data["authors"].append(name)
-            pub_data["author_profiles"].append(a.get("href", ""))
-
-    # Add non-member authors as well
-    non_member_authors_p_tag = soup.select_one(".introduction .relations.persons")
-    non_member_authors = "".join(
-        non_member_authors_p_tag.find_all(string=True, recursive=False)
-    ).strip()
-    if non_member_authors:
-        # non_member_authors_list = non_member_authors.strip(", ").split(",")
-        pub_data["authors"].extend(
-            a.strip() for a in non_member_authors.split(",") if a.strip()
-        )
-
-    year_elem = soup.select_one("[class*='details'] .properties .status td .date")
-    if year_elem:
-        logger.info("Year located.")
-        pub_data["year"] = year_elem.get_text(strip=True) if year_elem else "N/A"
-        pub_data["year_only"] = extract_year(pub_data["year"])
-
-    abstract_elem = soup.select_one("[class*='abstract'], .description, p.abstract")
-    if abstract_elem:
-        logger.info("Abstract located.")
-        pub_data["abstract"] = (
-            abstract_elem.get_text(strip=True) if abstract_elem else ""
-        )
-
-    doi_elem = soup.select_one("a[title*='DOI'], [href*='doi.org']")
-    if doi_elem:
-        pub_data["doi"] = doi_elem.get("href", "") if doi_elem else ""
-
-    pdf_elem = soup.select_one("a[href*='.pdf'], [title*='PDF']")
-    if pdf_elem:
-        pub_data["pdf_link"] = pdf_elem.get("href", "") if pdf_elem else ""
-
-    keyword_elem = retrieve_keywords(soup)
-    pub_data["keywords"] = keyword_elem if keyword_elem else ""
-
-    fingerprint_elem = retrieve_fingerprints(driver)
-    pub_data["fingerprints"] = fingerprint_elem if fingerprint_elem else ""
-
-    pub_data["content"] = preprocess(
-        f"{pub_data['title']} {' '.join(pub_data['authors'])} {pub_data['year']} {pub_data['abstract']} {pub_data['keywords'].replace(",", " ")} {pub_data['fingerprints'].replace(",", " ")}"
+    pub_data = parse_publication(
+        archive_page(driver, PUBLICATION, archive, pub_url), pub_url
     )
+    # Wait for the fingerprints either way, they are archived for reparsing
+    fingerprints = fingerprints.result()
+    if pub_data is None:
+        return None
 
+    pub_data = finish_publication(pub_data, fingerprints)
     unique_publications.add(pub_url)
-    pub_data["last_crawled"] = datetime.now().strftime("%Y-%m-%d %H:%M")
-    logger.info(f"LOGGER: Crawled details: {pub_data['title'][:50]} ... ")
     return pub_data
 
 
 def crawl_all_pages(
-    driver: WebDriver, wait: WebDriverWait, start_url: str
-) -> List[Dict[str, Any]]:
-    """Crawl all pages politely"""
-    all_pubs = []
+    driver: WebDriver,
+    start_url: str,
+    journal: CrawlJournal,
+    archive: PageArchive,
+) -> int:
+    """Crawl all pages politely, journaling every publication"""
+    crawled = 0
     current_url = start_url
     page_num = 0
     while current_url:
         print(f"Crawling all publications from page {page_num}: {current_url}")
-        driver.get(current_url)
-        logger.info(f"In {WAIT_TIME} seconds ...")
-        time.sleep(WAIT_TIME)
-        remove_consent_overlay(driver)
-
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-        pub_links = soup.select("#main-content .list-results .list-result-item h3 a")
+        load_page(driver, current_url, LISTING_READY)
 
         # Only for testing
         # i = 1
 
-        for link_elem in pub_links:
-            pub_url = link_elem.get("href")
-            if pub_url and not pub_url.startswith("https://"):
-                pub_url = "https://pureportal.coventry.ac.uk" + pub_url
+        pub_urls, next_url = parse_listing(archive_page(driver, LISTING, archive))
+        for pub_url in pub_urls:
             if pub_url:
-                pub_data = crawl_single_publication(driver, pub_url)
+                # One bad publication must not stop the page, nor every resume
+                try:
+                    pub_data = crawl_single_publication(driver, pub_url, archive)
+                except Exception as e:
+                    logger.warning(f"Error crawling publication {pub_url}: {e}")
+                    continue
                 if pub_data:
-                    all_pubs.append(pub_data)
+                    journal.append({"pub": pub_data})
+                    crawled += 1
                 # time.sleep(WAIT_TIME)
                 # logger.info(f"Sleeping for {WAIT_TIME} seconds ...")
 
@@ -275,117 +321,90 @@ def crawl_all_pages(
         # if page_num == 1:
         #     page_num = 6
 
-        # Handling pagination
-        try:
-            # Only for testing
-            # if page_num != 0:
-            #     current_url_page_no = current_url[-1]
-            #     replace_string = "page=" + current_url_page_no
-            #     replace_to = "page=" + str(page_num)
-            #     current_url = current_url.replace(replace_string, replace_to)
-
-            # Return back to home url to access pagination after being directed to single publication page
-            # If multiple authors have same publication then we won't re-crawl and as a result we will not be directed to that page
-            if driver.current_url != current_url:
-                driver.get(current_url)
-                logger.info(f"In {WAIT_TIME} seconds ...")
-                time.sleep(WAIT_TIME)
-                remove_consent_overlay(driver)
-            print(f"Current url {driver.current_url}")
-
-            try:
-                next_btn_exists = wait.until(
-                    EC.presence_of_element_located(
-                        (By.CSS_SELECTOR, ".pages .nextLink")
-                    )
-                )
-            except TimeoutException:
-                next_btn_exists = False
-
-            if next_btn_exists:
-                next_page_btn = wait.until(
-                    EC.element_to_be_clickable(
-                        (
-                            By.CSS_SELECTOR,
-                            ".pages .nextLink, a[rel='next'], .pagination .next",
-                        )
-                    )
-                )
-                next_url = next_page_btn.get_attribute("href")
-
-                if next_url and next_url != current_url:
-                    current_url = next_url
-                    page_num += 1
-            else:
-                current_url = None
-
-        except Exception as e:
-            print("Error during crawl", e)
+        # Pagination comes from the listing parsed above, so the driver need
+        # not be sent back to it after visiting the publications
+        if next_url and next_url != current_url:
+            current_url = next_url
+            page_num += 1
+        else:
             current_url = None
 
-    return all_pubs
-
-
-def crawl_all_profiles(
-    driver: WebDriver, wait: WebDriverWait, profiles_url: str
-) -> List[Dict[str, Any]]:
-    pubs_from_all_profiles = []
-    print(f"Crawling all profiles from {profiles_url}")
-    driver.get(profiles_url)
-    logger.info(f"In {WAIT_TIME} seconds ...")
-    time.sleep(WAIT_TIME)
-    remove_consent_overlay(driver)
-    soup = BeautifulSoup(driver.page_source, "html.parser")
-    profile_links = soup.select("#main-content .grid-results h3 a")
-
-    # Only for testing (i value)
-    # i = 1
-
-    for link_elem in profile_links:
-        try:
-            # if i in [1, 2, 10]:
-            # if i in [10]:
-            profile_url = link_elem.get("href")
-            if profile_url and not profile_url.startswith("https://"):
-                profile_url = "https://pureportal.coventry.ac.uk" + profile_url
-            if profile_url:
-                start_url = profile_url + "publications"
-                all_publications = crawl_all_pages(driver, wait, start_url)
-                pubs_from_all_profiles.extend(all_publications)
+        # The whole page is journaled, a resumed crawl starts at the next one
+        journal.checkpoint(
+            CRAWL_MODE,
+            {"page_url": current_url, "crawl": archive.crawl_id},
+        )
 
-        # if i == 3:
-        #     break
+    return crawled
 
-        # i += 1
-        except Exception as e:
-            print(f"Error in profile crawl {link_elem}:", e)
-            continue
 
-    return pubs_from_all_profiles
+def save_publications(
+    journal: CrawlJournal,
+    previous: Optional[Mapping[str, Dict[str, Any]]] = None,
+    changed_links: Optional[Set[str]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Compact the journal into the deduped corpus and rebuild the indexes. An
+    incremental crawl passes the previous corpus (by doc key, only its keys
+    are used) and the links it saw change, so only that delta is indexed.
+    Index building refits TF-IDF and BM25, so the corpus is loaded here.
+    """
+    journal.compact(INDEX_FILE)
+    with open(INDEX_FILE) as f:
+        unique_publications = json.load(f)
+    if changed_links is None or previous is None:
+        build_indexes(unique_publications)
+    else:
+        kept = {doc_key(pub) for pub in unique_publications}
+        changed_docs = [
+            pub
+            for pub in unique_publications
+            if pub["pub_link"] in changed_links or doc_key(pub) not in previous
+        ]
+        deleted_keys = [key for key in previous if key not in kept]
+        print(
+            f"Incremental crawl: {len(changed_docs)} new or changed, "
+            f"{len(deleted_keys)} removed"
+        )
+        build_indexes(unique_publications, changed_docs, deleted_keys)
+    print(f"Crawled and saved {len(unique_publications)} unique publications")
+    return unique_publications
 
 
-def crawl(base_url: str, org_url: str, headless: bool = True) -> List[Dict[str, Any]]:
+def crawl(
+    base_url: str, org_url: str, headless: bool = True, resume: bool = True
+) -> List[Dict[str, Any]]:
     """Entry point for the crawler
-    Crawl all pages, handle paginations and save indexes"""
+    Crawl the organisation's publication listing once, handle paginations
+    and save indexes. Authors and their profiles come from each publication
+    page, so co-authored papers are fetched once rather than per member."""
     if not robots_txt_satisfied(base_url):
         raise ValueError("Crawling disallowed by robots.txt")
 
-    driver, wait = setup_driver(headless)
+    journal = CrawlJournal()
+    checkpoint = journal.start(CRAWL_MODE, resume)
+    if checkpoint:
+        print(f"Resuming crawl at {checkpoint['page_url']}")
+        unique_publications.update(r["pub"]["pub_link"] for r in journal.records())
+    archive = PageArchive(crawl_id=checkpoint.get("crawl") if checkpoint else None)
+
+    driver, _ = setup_driver(headless)
     print("Driver configuration complete.")
     try:
-        profiles_url = get_persons_url(driver, org_url)
-        all_publications = crawl_all_profiles(driver, wait, profiles_url)
-        unique_publications = []
-        seen_titles = set()
-        for pub in all_publications:
-            if pub["title"] not in seen_titles:
-                seen_titles.add(pub["title"])
-                unique_publications.append(pub)
-        with open(INDEX_FILE, "w") as f:
-            json.dump(unique_publications, f, indent=2)
-        print(f"Crawled and saved {len(unique_publications)} unique publications")
-        return unique_publications
+        if checkpoint:
+            start_url = checkpoint["page_url"]
+        else:
+            start_url = get_publication_url(driver, org_url)
+            journal.checkpoint(
+                CRAWL_MODE, {"page_url": start_url, "crawl": archive.crawl_id}
+            )
+        if start_url:
+            crawl_all_pages(driver, start_url, journal, archive)
+        publications = save_publications(journal)
+        journal.finish()
+        return publications
     except Exception as e:
-        print("Error while crawling", e)
+        print("Error while crawling, the next crawl resumes from the journal", e)
     finally:
+        journal.close()
         driver.quit()
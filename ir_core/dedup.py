@@ -0,0 +1,113 @@
+import zlib
+import numpy as np
+
+from collections import defaultdict
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+
+from ir_core.preprocessors.analyzer import document_tokens
+
+# Word shingles over the analyzed content
+SHINGLE_SIZE = 3
+NUM_PERM = 128
+# 16 bands of 8 rows: pairs above ~0.7 Jaccard nearly always share a bucket
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+# Estimated Jaccard at which two records count as the same publication
+SIMILARITY_THRESHOLD = 0.8
+# Mersenne prime, small enough that a * x + b cannot overflow uint64
+PRIME = (1 << 31) - 1
+SEED = 42
+
+_rng = np.random.default_rng(SEED)
+_A = _rng.integers(1, PRIME, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, PRIME, NUM_PERM, dtype=np.uint64)
+
+
+def shingle_hashes(tokens: List[str], size: int = SHINGLE_SIZE) -> np.ndarray:
+    """Stable 31-bit hashes of the distinct token shingles"""
+    if len(tokens) <= size:
+        shingles = {" ".join(tokens)} if tokens else set()
+    else:
+        shingles = {
+            " ".join(tokens[i : i + size]) for i in range(len(tokens) - size + 1)
+        }
+    return np.fromiter(
+        (zlib.crc32(s.encode("utf-8")) % PRIME for s in shingles),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+
+
+def minhash_signature(pub: Dict[str, Any]) -> Optional[np.ndarray]:
+    """MinHash signature of a publication's content, None when it has none"""
+    hashes = shingle_hashes(document_tokens(pub))
+    if not len(hashes):
+        return None
+    return ((_A[:, None] * hashes[None, :] + _B[:, None]) % PRIME).min(axis=1)
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    return float(np.mean(a == b))
+
+
+def near_duplicate_clusters(
+    signatures: List[Optional[np.ndarray]],
+    threshold: float = SIMILARITY_THRESHOLD,
+) -> List[List[int]]:
+    """
+    Group signature indices into near-duplicate clusters. LSH banding only
+    compares records that agree on a whole band, so the work grows with the
+    number of candidates rather than the square of the corpus.
+    """
+    parent = list(range(len(signatures)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for band in range(BANDS):
+        buckets: Dict[bytes, List[int]] = defaultdict(list)
+        rows = slice(band * ROWS, (band + 1) * ROWS)
+        for i, signature in enumerate(signatures):
+            if signature is not None:
+                buckets[signature[rows].tobytes()].append(i)
+        for members in buckets.values():
+            for n, i in enumerate(members):
+                for j in members[n + 1 :]:
+                    root_i, root_j = find(i), find(j)
+                    if root_i == root_j:
+                        continue
+                    if similarity(signatures[i], signatures[j]) >= threshold:
+                        parent[root_j] = root_i
+
+    clusters: Dict[int, List[int]] = defaultdict(list)
+    for i in range(len(signatures)):
+        clusters[find(i)].append(i)
+    return list(clusters.values())
+
+
+def canonical_rank(pub: Dict[str, Any]) -> Tuple:
+    """Prefer the published version: a DOI, the later year, the fuller record"""
+    year = str(pub.get("year_only") or "")
+    return (
+        bool(pub.get("doi")),
+        year if year.isdigit() else "",
+        len(pub.get("abstract") or ""),
+        bool(pub.get("fingerprints")),
+    )
+
+
+def canonical_indices(ranks: List[Tuple], clusters: Iterable[List[int]]) -> List[int]:
+    """Index of the record kept for each cluster, in first-seen order"""
+    kept = [max(cluster, key=lambda i: (ranks[i], -i)) for cluster in clusters]
+    return sorted(kept)
+
+
+def deduplicate(pubs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Keep one canonical record per cluster of near-duplicate publications"""
+    clusters = near_duplicate_clusters([minhash_signature(pub) for pub in pubs])
+    ranks = [canonical_rank(pub) for pub in pubs]
+    return [pubs[i] for i in canonical_indices(ranks, clusters)]
@@ -1,49 +1,78 @@
-from typing import List, Set, Dict
-from sklearn.metrics import precision_recall_fscore_support
+from pathlib import Path
+from typing import List, Set, Dict, Optional, Tuple, Union
 from constants.constants import STANDARD_MAPPING_FILE
 
 import numpy as np
 import json
+import math
+
+# (path, mtime) -> qrels, so the file is read once until it changes
+_qrels_cache: Dict[Tuple[Path, float], Dict[str, List[Union[str, int]]]] = {}
+# The id map of the last corpus seen, snapshot docs lists are long-lived
+_id_map_cache: Tuple[Optional[List[Dict]], Dict[str, int]] = (None, {})
+
+
+def load_qrels(path: Path = STANDARD_MAPPING_FILE) -> Dict[str, List[Union[str, int]]]:
+    """
+    Relevant publications per lowercased query, by pub_link. Older files
+    list doc ids (positions in publications.json) instead.
+    """
+    if not path.exists():
+        return {}
+    key = (path, path.stat().st_mtime)
+    if key not in _qrels_cache:
+        with open(path) as f:
+            _qrels_cache.clear()
+            _qrels_cache[key] = json.load(f)
+    return _qrels_cache[key]
+
+
+def doc_id_map(all_docs: List[Dict]) -> Dict[str, int]:
+    """pub_link -> position of its publication, replaces list.index scans"""
+    global _id_map_cache
+    cached_docs, id_map = _id_map_cache
+    if cached_docs is not all_docs:
+        id_map = {}
+        for doc_id, doc in enumerate(all_docs):
+            id_map.setdefault(doc["pub_link"], doc_id)
+        _id_map_cache = (all_docs, id_map)
+    return id_map
+
+
+def relevant_doc_ids(judged: List[Union[str, int]], id_map: Dict[str, int]) -> Set[int]:
+    """Doc ids of judged publications, skipping pub_links no longer indexed"""
+    doc_ids = set()
+    for doc in judged:
+        if isinstance(doc, int):
+            doc_ids.add(doc)
+        elif doc in id_map:
+            doc_ids.add(id_map[doc])
+    return doc_ids
 
 
 def top_docs_as_standard(
     query: str,
-    docs_title_flattened: List[Dict],
-    results_title_flattened: List[Dict],
+    id_map: Dict[str, int],
+    results_links: List[str],
     k: int = 5,
 ) -> Set[int]:
-    top_docs = []
     """Load from json first and if not present fallback to top results"""
-    if STANDARD_MAPPING_FILE.exists():
-        with open(STANDARD_MAPPING_FILE) as f:
-            standard_data = json.load(f)
-            top_docs = set(standard_data.get(query.lower(), []))
-            if top_docs:
-                return top_docs
-
-    top_docs = {docs_title_flattened.index(r) for r in results_title_flattened[:k]}
+    top_docs = relevant_doc_ids(load_qrels().get(query.lower(), []), id_map)
+    if top_docs:
+        return top_docs
+
+    top_docs = {id_map[r] for r in results_links[:k]}
     return top_docs
 
 
 def evaluate_search(
     query: str, retrieved_docs: List[Dict], all_docs: List[Dict]
 ) -> Dict:
-    docs_title_flattened = [d["title"] for d in all_docs]
-    results_title_flattened = [r["title"] for r in retrieved_docs]
-    standard = top_docs_as_standard(
-        query, docs_title_flattened, results_title_flattened
-    )
+    id_map = doc_id_map(all_docs)
+    results_links = [r["pub_link"] for r in retrieved_docs]
+    standard = top_docs_as_standard(query, id_map, results_links)
 
-    y_true = np.zeros(len(results_title_flattened))
-    y_pred = np.zeros(len(results_title_flattened))
-
-    retrieved_ids = []
-    for i, doc in enumerate(results_title_flattened):
-        doc_id = docs_title_flattened.index(doc)
-        retrieved_ids.append(doc_id)
-        if doc_id in standard:
-            y_true[i] = 1
-            y_pred[i] = 1
+    retrieved_ids = [id_map[link] for link in results_links]
 
     tp = len(standard & set(retrieved_ids))
     fp = len(set(retrieved_ids) - standard)
@@ -64,3 +93,53 @@ def evaluate_search(
         "relevant_found": tp,
         "total_relevant": len(standard),
     }
+
+
+def precision_at_k(ranked: List[int], relevant: Set[int], k: int) -> float:
+    return sum(1 for doc_id in ranked[:k] if doc_id in relevant) / k
+
+
+def average_precision(ranked: List[int], relevant: Set[int]) -> float:
+    hits = 0
+    total = 0.0
+    for rank, doc_id in enumerate(ranked, 1):
+        if doc_id in relevant:
+            hits += 1
+            total += hits / rank
+    return total / len(relevant) if relevant else 0.0
+
+
+def reciprocal_rank(ranked: List[int], relevant: Set[int]) -> float:
+    for rank, doc_id in enumerate(ranked, 1):
+        if doc_id in relevant:
+            return 1 / rank
+    return 0.0
+
+
+def ndcg_at_k(ranked: List[int], relevant: Set[int], k: int) -> float:
+    """Binary-relevance nDCG"""
+    dcg = sum(
+        1 / math.log2(rank + 1)
+        for rank, doc_id in enumerate(ranked[:k], 1)
+        if doc_id in relevant
+    )
+    ideal = sum(1 / math.log2(rank + 1) for rank in range(1, min(len(relevant), k) + 1))
+    return dcg / ideal if ideal else 0.0
+
+
+def ranking_metrics(
+    runs: Dict[str, List[int]], qrels: Dict[str, List[int]], k: int
+) -> Dict[str, float]:
+    """Mean P@k, MAP, MRR and nDCG@k of ranked doc ids per query"""
+    scores = {f"P@{k}": [], "MAP": [], "MRR": [], f"nDCG@{k}": []}
+    for query, relevant_ids in qrels.items():
+        ranked = runs.get(query, [])
+        relevant = set(relevant_ids)
+        scores[f"P@{k}"].append(precision_at_k(ranked, relevant, k))
+        scores["MAP"].append(average_precision(ranked, relevant))
+        scores["MRR"].append(reciprocal_rank(ranked, relevant))
+        scores[f"nDCG@{k}"].append(ndcg_at_k(ranked, relevant, k))
+    return {
+        name: round(float(np.mean(values)), 4) if values else 0.0
+        for name, values in scores.items()
+    }
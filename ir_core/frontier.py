@@ -0,0 +1,93 @@
+import threading
+
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Set, Tuple
+from urllib.parse import urldefrag
+
+
+def normalize_url(url: str) -> str:
+    """Drop fragments and trailing slashes so one page is queued once"""
+    return urldefrag(url)[0].rstrip("/")
+
+
+class URLFrontier:
+    """
+    Thread-safe FIFO of (url, kind, payload) shared by the crawl workers.
+    The payload carries JSON-able state a page needs, so it is checkpointed
+    along with the URL.
+
+    Every URL is queued at most once. `get` blocks while other workers may
+    still add work and returns None once the queue is empty and nothing is
+    in flight, which is the signal for workers to stop.
+    """
+
+    def __init__(self):
+        self._queue: Deque[Tuple[str, str, Any]] = deque()
+        self._seen: Set[str] = set()
+        self._in_flight: Dict[str, Tuple[str, str, Any]] = {}
+        self._stopped = False
+        self._cond = threading.Condition()
+
+    @classmethod
+    def restore(cls, snapshot: Dict[str, Any]) -> "URLFrontier":
+        """Rebuild a frontier from `snapshot`, in-flight URLs are queued again"""
+        frontier = cls()
+        frontier._seen = set(snapshot["seen"])
+        frontier._queue = deque(tuple(item) for item in snapshot["pending"])
+        return frontier
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._cond:
+            pending = list(self._in_flight.values()) + list(self._queue)
+            return {"pending": pending, "seen": list(self._seen)}
+
+    def add(self, url: str, kind: str, payload: Any = None) -> bool:
+        """Queue a URL unless it was seen before"""
+        key = normalize_url(url)
+        with self._cond:
+            if key in self._seen:
+                return False
+            self._seen.add(key)
+            self._queue.append((url, kind, payload))
+            self._cond.notify()
+            return True
+
+    def push(self, url: str, kind: str, payload: Any = None) -> None:
+        """Queue a URL ahead of everything else, bypassing the seen check"""
+        with self._cond:
+            self._seen.add(normalize_url(url))
+            self._queue.appendleft((url, kind, payload))
+            self._cond.notify()
+
+    def get(self) -> Optional[Tuple[str, str, Any]]:
+        with self._cond:
+            while not self._queue and not self._stopped:
+                if not self._in_flight:
+                    self._cond.notify_all()
+                    return None
+                self._cond.wait()
+            if self._stopped:
+                return None
+            item = self._queue.popleft()
+            self._in_flight[item[0]] = item
+            return item
+
+    def task_done(self, item: Tuple[str, str, Any]) -> None:
+        with self._cond:
+            self._in_flight.pop(item[0], None)
+            if not self._in_flight and not self._queue:
+                self._cond.notify_all()
+
+    def stop(self) -> None:
+        """Have every `get` return None, leaving queued and in-flight URLs pending"""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    def __len__(self) -> int:
+        with self._cond:
+            return len(self._queue)
+
+    @property
+    def seen(self) -> int:
+        return len(self._seen)
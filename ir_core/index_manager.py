@@ -1,75 +1,279 @@
-import json
 import numpy as np
 
-from typing import List, Dict, Any, Tuple
-from constants.constants import INDEX_FILE_PATH, INDEX_FILE_POSITIONAL
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from typing import List, Dict, Any, Tuple, Optional
+from ir_core.tfidf_index import (
+    build_tfidf_index,
+    tfidf_query_matrix,
+    tfidf_query_vector,
+)
+from ir_core.bm25_index import build_bm25_index, bm25_search
+from ir_core.corpus_stats import save_corpus_stats
+from ir_core.index_service import (
+    IndexSnapshot,
+    generation_id,
+    get_index_service,
+    load_index,
+    publish_generation,
+)
 from ir_core.postitional_index import (
-    load_positional_index,
-    build_positional_index,
+    update_positional_index,
     phrase_search,
     keyword_search,
 )
+from ir_core.proximity import parse_proximity_query
+from ir_core.topk import top_k_dense, top_k_sparse
+from ir_core.query_cache import QueryCache
+from ir_core.timing import METRICS_LOG, SearchTiming, current_timing, log_timing, span
 from ir_core.preprocessors.preprocess import preprocess
 
+# Default proximity slack for unquoted multi-word queries
+PHRASE_WINDOW = 5
+# auto: phrase search for multi-word queries, TF-IDF otherwise
+ENGINES = ("auto", "phrase", "bm25", "tfidf", "keyword")
+# Queries scored per sparse product in search_many, bounds the score matrix
+TFIDF_BATCH_SIZE = 64
 
-def load_index() -> List[Dict[str, Any]]:
-    """Load crawled data"""
-    if not INDEX_FILE_PATH.exists():
-        return []
-    with open(INDEX_FILE_PATH) as f:
-        return json.load(f)
+_query_cache = QueryCache()
 
 
-def build_tfidf_index(docs: List[Dict[str, Any]]) -> Dict:
-    contents = [preprocess(pub.get("content", "")) for pub in docs]
-    vectorizer = TfidfVectorizer(stop_words="english")
-    tfidf_matrix = vectorizer.fit_transform(contents)
-    return {
-        "docs": docs,
-        "tfidf_matrix": tfidf_matrix,
-        "vectorizer": vectorizer,
-        "feature_names": vectorizer.get_feature_names_out(),
-    }
+def build_indexes(
+    docs: List[Dict[str, Any]],
+    changed_docs: Optional[List[Dict[str, Any]]] = None,
+    deleted_keys: Optional[List[str]] = None,
+) -> None:
+    """
+    Build every index once, at crawl/index time. With a known delta only the
+    changed docs are positionally indexed; TF-IDF and BM25 depend on corpus
+    wide statistics and are refit over all docs, as are the Summary page
+    statistics.
+    """
+    update_positional_index(docs, changed_docs, deleted_keys)
+    build_tfidf_index(docs)
+    build_bm25_index(docs)
+    published = publish_generation()
+    save_corpus_stats(docs, generation_id(published))
 
 
-def search_TFIDF(query: str, top_k: int = 10) -> List[Dict[str, Any]]:
-    docs = load_index()
-    if not docs:
+def search_TFIDF(
+    query: str,
+    top_k: int = 10,
+    snapshot: Optional[IndexSnapshot] = None,
+    analyzed: bool = False,
+) -> List[Dict[str, Any]]:
+    snapshot = snapshot or get_index_service().snapshot()
+    docs = snapshot.docs
+    index = snapshot.tfidf
+    if not docs or index is None:
         return []
-    index = build_tfidf_index(docs)
-    query_vec = index["vectorizer"].transform([preprocess(query)])
-    cosine_similarities = cosine_similarity(query_vec, index["tfidf_matrix"]).flatten()
-    ranked_indices = np.argsort(cosine_similarities)[::-1][:top_k]
+    if not analyzed:
+        query = preprocess(query)
+    with span("scoring"):
+        query_vec = tfidf_query_vector(index, query.split())
+        # Rows and query are L2-normalised, so a dot product is the cosine
+        cosine_similarities = index["tfidf_matrix"] @ query_vec
+    with span("candidates"):
+        ranked_indices = top_k_dense(cosine_similarities, top_k)
+    with span("materialize"):
+        return _tfidf_results(docs, ranked_indices, cosine_similarities[ranked_indices])
+
+
+def search_TFIDF_many(
+    queries: List[str],
+    top_k: int = 10,
+    snapshot: Optional[IndexSnapshot] = None,
+    analyzed: bool = False,
+) -> List[List[Dict[str, Any]]]:
+    """
+    search_TFIDF for a batch: queries become rows of one sparse matrix,
+    scored against every doc by a single sparse product per chunk.
+    """
+    snapshot = snapshot or get_index_service().snapshot()
+    docs = snapshot.docs
+    index = snapshot.tfidf
+    if not docs or index is None:
+        return [[] for _ in queries]
+    if not analyzed:
+        queries = [preprocess(query) for query in queries]
+
+    term_matrix = index["term_matrix"]
     results = []
-    for idx in ranked_indices:
-        score = cosine_similarities[idx]
+    for start in range(0, len(queries), TFIDF_BATCH_SIZE):
+        chunk = queries[start : start + TFIDF_BATCH_SIZE]
+        query_matrix = tfidf_query_matrix(index, [query.split() for query in chunk])
+        scores = query_matrix @ term_matrix
+        for row in range(len(chunk)):
+            lo, hi = scores.indptr[row], scores.indptr[row + 1]
+            row_docs, row_scores = scores.indices[lo:hi], scores.data[lo:hi]
+            top = top_k_sparse(row_docs, row_scores, top_k)
+            results.append(_tfidf_results(docs, row_docs[top], row_scores[top]))
+    return results
+
+
+def _tfidf_results(
+    docs: List[Dict[str, Any]], doc_ids: np.ndarray, scores: np.ndarray
+) -> List[Dict[str, Any]]:
+    results = []
+    for idx, score in zip(doc_ids, scores):
         if score > 0.05:
-            doc = index["docs"][idx]
+            doc = docs[idx]
             # Highlight matching parts
             snippet = doc.get("abstract", doc["title"])[:200] + "..."
             results.append({**doc, "relevancy_score": float(score), "snippet": snippet})
     return results
 
 
-def search(query: str, top_k: int = 10) -> Tuple[str, List[Dict[str, Any]]]:
-    docs = load_index()
-    if not docs:
-        return []
+def _run_search(
+    snapshot: IndexSnapshot,
+    query: str,
+    window: int,
+    ordered: bool,
+    top_k: int,
+    engine: str,
+) -> Tuple[str, List[Dict[str, Any]]]:
+    return _search_postings(snapshot, query, window, ordered, top_k, engine) or (
+        "TFIDF",
+        search_TFIDF(query, top_k, snapshot, analyzed=True),
+    )
 
-    if not INDEX_FILE_POSITIONAL.exists():
-        build_positional_index(docs)
 
-    postings = load_positional_index()
+def _search_postings(
+    snapshot: IndexSnapshot,
+    query: str,
+    window: int,
+    ordered: bool,
+    top_k: int,
+    engine: str,
+) -> Optional[Tuple[str, List[Dict[str, Any]]]]:
+    """Every engine but TF-IDF, None when the query is left to TF-IDF"""
+    docs = snapshot.docs
+    postings = snapshot.postings
+    if engine == "bm25":
+        return "BM25", bm25_search(snapshot.bm25, query, docs, top_k)
+    if engine == "tfidf":
+        return None
+    if engine == "keyword":
+        return "KW", keyword_search(postings, query, snapshot.doc_table, top_k)
 
-    query = preprocess(query)
-    # Phrase if quoted or multi-word
-    if '"' in query or len(query.split()) >= 2:
-        phrase = query.strip('"')
-        results = phrase_search(postings, phrase, docs, top_k)
-        if results:
+    # Phrase if quoted, NEAR/k or multi-word
+    if engine == "phrase" or window >= 0 or len(query.split()) >= 2:
+        results = phrase_search(
+            postings,
+            query,
+            snapshot.doc_table,
+            top_k,
+            window=window if window >= 0 else PHRASE_WINDOW,
+            ordered=ordered,
+        )
+        if results or engine == "phrase":
             return "PI", results
     # Keyword fallback
-    # return keyword_search(postings, query, docs, top_k)
-    return "TFIDF", search_TFIDF(query, top_k)
+    # return keyword_search(postings, query, snapshot.doc_table, top_k)
+    return None
+
+
+def search(
+    query: str, top_k: int = 10, engine: str = "auto"
+) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Search the current index generation. Results are cached per analysed
+    query, engine and top_k; cached result lists are shared, not copied.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown search engine: {engine}")
+    with span("load_docs"):
+        snapshot = get_index_service().snapshot()
+    if not snapshot.docs:
+        return "", []
+
+    with span("analyze"):
+        query, window, ordered = parse_proximity_query(query)
+        query = preprocess(query)
+    key = (query, window, ordered, engine, top_k)
+    cached = _query_cache.get(key, snapshot.generation)
+    timing = current_timing()
+    if cached is not None:
+        if timing:
+            timing.cached = True
+            timing.search_type = cached[0]
+        return cached
+
+    result = _run_search(snapshot, query, window, ordered, top_k, engine)
+    if timing:
+        timing.search_type = result[0]
+    _query_cache.put(key, result, snapshot.generation)
+    return result
+
+
+def search_many(
+    queries: List[str], top_k: int = 10, engine: str = "auto"
+) -> List[Tuple[str, List[Dict[str, Any]]]]:
+    """
+    search() over a batch, results in query order. Repeated queries are
+    analyzed and ranked once, and every query left to TF-IDF is scored in
+    one sparse matrix product.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown search engine: {engine}")
+    snapshot = get_index_service().snapshot()
+    if not snapshot.docs:
+        return [("", []) for _ in queries]
+
+    analyzed: Dict[str, Tuple] = {}
+    for query in queries:
+        if query not in analyzed:
+            text, window, ordered = parse_proximity_query(query)
+            analyzed[query] = (preprocess(text), window, ordered, engine, top_k)
+    keys = [analyzed[query] for query in queries]
+
+    results: Dict[Tuple, Tuple[str, List[Dict[str, Any]]]] = {}
+    pending = []
+    for key in dict.fromkeys(keys):
+        cached = _query_cache.get(key, snapshot.generation)
+        if cached is not None:
+            results[key] = cached
+        else:
+            pending.append(key)
+
+    tfidf_keys = []
+    for key in pending:
+        query, window, ordered = key[:3]
+        result = _search_postings(snapshot, query, window, ordered, top_k, engine)
+        if result is None:
+            tfidf_keys.append(key)
+        else:
+            results[key] = result
+    ranked = search_TFIDF_many(
+        [key[0] for key in tfidf_keys], top_k, snapshot, analyzed=True
+    )
+    for key, tfidf_results in zip(tfidf_keys, ranked):
+        results[key] = ("TFIDF", tfidf_results)
+
+    for key in pending:
+        _query_cache.put(key, results[key], snapshot.generation)
+    return [results[key] for key in keys]
+
+
+def timed_search(
+    query: str, top_k: int = 10, engine: str = "auto", log: bool = METRICS_LOG
+) -> Tuple[str, List[Dict[str, Any]], Dict[str, Any]]:
+    """search plus a timing record of its stages, optionally logged"""
+    with SearchTiming(query, engine) as timing:
+        search_type, results = search(query, top_k, engine)
+    record = timing.record()
+    if log:
+        log_timing(record)
+    return search_type, results, record
+
+
+def query_cache_stats() -> Dict[str, Any]:
+    return _query_cache.stats()
+
+
+if __name__ == "__main__":
+    # Build and publish every index from publications.json, e.g. after a clone
+    docs = load_index()
+    if not docs:
+        print("No publications to index, run the crawler first")
+    else:
+        build_indexes(docs)
+        print(f"Indexed {len(docs)} publications")
@@ -0,0 +1,178 @@
+import os
+import json
+import time
+import threading
+
+from typing import List, Dict, Any, Optional, NamedTuple, Tuple
+
+from constants.constants import (
+    INDEX_FILE_PATH,
+    INDEX_GENERATION_FILE,
+    SEGMENT_MANIFEST_FILE,
+)
+from ir_core.bm25_index import load_bm25_index, bm25_index_is_stale
+from ir_core.tfidf_index import load_tfidf_index, tfidf_index_is_stale
+from ir_core.postitional_index import (
+    load_positional_index,
+    positional_index_needs_rebuild,
+    positional_index_is_stale,
+)
+
+# Seconds between generation checks, keeps queries free of disk I/O
+RELOAD_CHECK_INTERVAL = 2.0
+
+
+class IndexSnapshot(NamedTuple):
+    generation: str
+    docs: List[Dict[str, Any]]
+    # Publications addressed by positional index doc id (None if deleted)
+    doc_table: List[Optional[Dict[str, Any]]]
+    postings: Dict
+    tfidf: Optional[Dict[str, Any]]
+    bm25: Optional[Dict[str, Any]]
+
+
+def load_index() -> List[Dict[str, Any]]:
+    """Load crawled data"""
+    if not INDEX_FILE_PATH.exists():
+        return []
+    with open(INDEX_FILE_PATH) as f:
+        return json.load(f)
+
+
+def publish_generation() -> str:
+    """Mark a freshly built set of indexes as the current generation"""
+    generation = str(time.time_ns())
+    tmp_path = INDEX_GENERATION_FILE.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        f.write(generation)
+    os.replace(tmp_path, INDEX_GENERATION_FILE)
+    return generation
+
+
+def generation_id(published: str) -> str:
+    """
+    Published id plus the publications mtime: files rebuilt without a
+    publish still get a new id, so nothing cached per generation outlives them
+    """
+    return "{}.{}".format(published, INDEX_FILE_PATH.stat().st_mtime_ns)
+
+
+def _file_signature() -> Tuple[int, int, int]:
+    """Modification times that identify the generation on disk"""
+    signature = []
+    for path in (INDEX_FILE_PATH, INDEX_GENERATION_FILE, SEGMENT_MANIFEST_FILE):
+        try:
+            signature.append(path.stat().st_mtime_ns)
+        except FileNotFoundError:
+            signature.append(0)
+    return tuple(signature)
+
+
+class IndexService:
+    """
+    Keeps docs, postings and the ranking models resident for the whole process
+    and hot-swaps them when a new index generation is published. Readers only
+    load, they never build.
+    """
+
+    def __init__(self, check_interval: float = RELOAD_CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._snapshot: Optional[IndexSnapshot] = None
+        self._signature: Optional[Tuple[int, int, int]] = None
+        self._last_check = 0.0
+
+    def _load(self) -> Optional[IndexSnapshot]:
+        """
+        Load the published indexes, None while no generation is published or
+        any index is older than publications.json (a build is in progress).
+        Building is left to the crawler, reparse and python -m
+        ir_core.index_manager.
+        """
+        if not INDEX_GENERATION_FILE.exists():
+            return None
+        if (
+            positional_index_needs_rebuild()
+            or positional_index_is_stale()
+            or tfidf_index_is_stale()
+            or bm25_index_is_stale()
+        ):
+            return None
+
+        docs = load_index()
+        if not docs:
+            return IndexSnapshot("", [], [], {}, None, None)
+        postings = load_positional_index()
+        doc_table = postings.doc_table(docs) if postings else docs
+        tfidf = load_tfidf_index()
+        bm25 = load_bm25_index()
+        generation = generation_id(INDEX_GENERATION_FILE.read_text().strip())
+        return IndexSnapshot(generation, docs, doc_table, postings, tfidf, bm25)
+
+    def refresh(self, force: bool = False) -> bool:
+        """Reload if the files on disk changed, returns True on a swap"""
+        now = time.monotonic()
+        if (
+            not force
+            and self._snapshot is not None
+            and now - self._last_check < self.check_interval
+        ):
+            return False
+
+        with self._lock:
+            self._last_check = now
+            signature = _file_signature()
+            if (
+                not force
+                and self._snapshot is not None
+                and signature == self._signature
+            ):
+                return False
+            # Build the new generation fully before swapping it in
+            snapshot = self._load()
+            if _file_signature() != signature:
+                # A build wrote files while loading, retry on the next check
+                snapshot = None
+            else:
+                self._signature = signature
+            if snapshot is None:
+                # Keep serving the last generation until a new one is published
+                if self._snapshot is None:
+                    self._snapshot = IndexSnapshot("", [], [], {}, None, None)
+                    print(
+                        "No current index generation, build one with a crawl or "
+                        "python -m ir_core.index_manager"
+                    )
+                return False
+            self._snapshot = snapshot
+
+        print(f"Index generation loaded: {self._snapshot.generation}")
+        return True
+
+    def snapshot(self) -> IndexSnapshot:
+        """Current generation, one consistent view for a whole query"""
+        self.refresh()
+        return self._snapshot
+
+    @property
+    def docs(self) -> List[Dict[str, Any]]:
+        return self.snapshot().docs
+
+    @property
+    def generation(self) -> str:
+        return self.snapshot().generation
+
+
+_service: Optional[IndexService] = None
+_service_lock = threading.Lock()
+
+
+def get_index_service() -> IndexService:
+    """Process-wide IndexService singleton"""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = IndexService()
+    return _service
@@ -0,0 +1,118 @@
+import os
+import gzip
+import json
+import hashlib
+import tempfile
+import threading
+
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Iterator, Optional
+
+from constants.constants import PAGE_ARCHIVE_PATH
+from ir_core.crawl_state import TIME_FORMAT
+from ir_core.frontier import normalize_url
+
+# A fetched page, and a page an incremental crawl kept from an earlier fetch
+RESPONSE = "response"
+REVISIT = "revisit"
+COMPRESS_LEVEL = 6
+
+
+def new_crawl_id() -> str:
+    return datetime.now().strftime("%Y%m%d%H%M%S")
+
+
+class PageArchive:
+    """
+    WARC-like archive of every fetched page. Bodies are gzip blobs named by
+    the SHA-1 of their content, so a page that did not change between crawls
+    is stored once. records.jsonl logs each fetch in crawl order as
+    {type, crawl, url, kind, digest, date}.
+    """
+
+    def __init__(self, root: Path = PAGE_ARCHIVE_PATH, crawl_id: str = None):
+        self.root = root
+        self.records_path = root / "records.jsonl"
+        self.crawl_id = crawl_id or new_crawl_id()
+        self._latest: Optional[Dict[str, str]] = None
+        self._lock = threading.Lock()
+
+    def blob_path(self, digest: str) -> Path:
+        return self.root / "objects" / digest[:2] / f"{digest[2:]}.html.gz"
+
+    def store(self, url: str, kind: str, html: str) -> str:
+        """Archive a fetched page, returns its content digest"""
+        data = html.encode("utf-8")
+        digest = hashlib.sha1(data).hexdigest()
+        path = self.blob_path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(gzip.compress(data, COMPRESS_LEVEL))
+            os.replace(tmp_path, path)
+        self._append(RESPONSE, url, kind, digest)
+        return digest
+
+    def revisit(self, url: str, kind: str) -> Optional[str]:
+        """Record that this crawl kept the archived copy of `url`"""
+        digest = self.latest().get(normalize_url(url))
+        if digest:
+            self._append(REVISIT, url, kind, digest)
+        return digest
+
+    def archived(self, url: str) -> bool:
+        return normalize_url(url) in self.latest()
+
+    def _append(self, record_type: str, url: str, kind: str, digest: str) -> None:
+        record = {
+            "type": record_type,
+            "crawl": self.crawl_id,
+            "url": url,
+            "kind": kind,
+            "digest": digest,
+            "date": datetime.now().strftime(TIME_FORMAT),
+        }
+        line = json.dumps(record) + "\n"
+        with self._lock:
+            self.root.mkdir(parents=True, exist_ok=True)
+            with open(self.records_path, "a") as f:
+                f.write(line)
+            if self._latest is not None:
+                self._latest[normalize_url(url)] = digest
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        """Archive records in fetch order, skipping a line torn by a crash"""
+        if not self.records_path.exists():
+            return
+        with open(self.records_path) as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+    def latest(self) -> Dict[str, str]:
+        """Normalized URL -> digest of its most recent archived copy"""
+        with self._lock:
+            if self._latest is None:
+                self._latest = {
+                    normalize_url(r["url"]): r["digest"] for r in self.records()
+                }
+            return self._latest
+
+    def latest_crawl(self) -> Optional[str]:
+        crawl_id = None
+        for record in self.records():
+            crawl_id = record["crawl"]
+        return crawl_id
+
+    def read(self, digest: str) -> str:
+        with open(self.blob_path(digest), "rb") as f:
+            return gzip.decompress(f.read()).decode("utf-8")
+
+    def page(self, url: str) -> Optional[str]:
+        """Most recent archived copy of `url`"""
+        digest = self.latest().get(normalize_url(url))
+        return self.read(digest) if digest else None
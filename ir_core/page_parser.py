@@ -0,0 +1,210 @@
+import re
+import logging
+
+from typing import List, Dict, Any, Optional, Tuple
+from bs4 import BeautifulSoup, SoupStrainer
+
+from utils.util import extract_year
+
+logger = logging.getLogger(__name__)
+
+PORTAL_URL = "https://pureportal.coventry.ac.uk"
+
+# Page kinds, also the frontier kinds of the parallel crawler
+ORGANISATION = "organisation"
+LISTING = "listing"
+PUBLICATION = "publication"
+FINGERPRINTS = "fingerprints"
+
+
+class SectionStrainer(SoupStrainer):
+    """
+    Only build the page sections extraction reads: top-level tags named in
+    `names`, with a class matching `classes`, or links whose href, title or
+    rel match `links`. Everything nested in a kept tag is kept.
+    """
+
+    def __init__(self, names=(), classes: str = None, links: str = None):
+        super().__init__()
+        self.names = set(names)
+        self.classes = re.compile(classes) if classes else None
+        self.links = re.compile(links) if links else None
+
+    def allow_tag_creation(self, nsprefix, name, attrs) -> bool:
+        if name in self.names:
+            return True
+        attrs = attrs or {}
+        css_class = attrs.get("class") or ""
+        if not isinstance(css_class, str):
+            css_class = " ".join(css_class)
+        if self.classes and self.classes.search(css_class):
+            return True
+        if self.links:
+            target = " ".join(
+                str(attrs.get(attr, "")) for attr in ("href", "title", "rel")
+            )
+            return bool(self.links.search(target))
+        return False
+
+    def allow_string_creation(self, string) -> bool:
+        return False
+
+
+STRAINERS = {
+    ORGANISATION: SectionStrainer(classes=r"subMenu"),
+    LISTING: SectionStrainer(
+        classes=r"list-results|pages|pagination", links=r"\bnext\b"
+    ),
+    PUBLICATION: SectionStrainer(
+        names=("h1",),
+        classes=r"introduction|details|abstract|description|keyword-group",
+        links=r"doi\.org|DOI|\.pdf|PDF",
+    ),
+    FINGERPRINTS: SectionStrainer(classes=r"publication-fingerprints"),
+}
+
+
+def make_soup(html: str, kind: str = None) -> BeautifulSoup:
+    return BeautifulSoup(html, "html.parser", parse_only=STRAINERS.get(kind))
+
+
+def absolute_url(href: str) -> str:
+    if href and not href.startswith("https://"):
+        return PORTAL_URL + href
+    return href
+
+
+def retrieve_keywords(soup: BeautifulSoup) -> str:
+    keywords_elem = soup.select(".keyword-group .relations.keywords span")
+    if keywords_elem:
+        return ",".join(k.get_text(strip=True) for k in keywords_elem)
+    return None
+
+
+def parse_fingerprints(html: str) -> str:
+    soup = make_soup(html, FINGERPRINTS)
+    fingerprint_elem = soup.select(
+        ".publication-fingerprints .concept_listing span.concept"
+    )
+    if fingerprint_elem:
+        return ",".join(f.get_text(strip=True) for f in fingerprint_elem)
+    return None
+
+
+def fingerprints_url(pub_url: str) -> str:
+    """A publication's fingerprints tab, known without loading the publication"""
+    return pub_url.rstrip("/") + "/fingerprints/"
+
+
+def submenu_link(soup: BeautifulSoup, pattern: str) -> Optional[str]:
+    """Absolute URL of the organisation/publication submenu tab matching `pattern`"""
+    link = soup.select_one(f".subMenu a[href*='{pattern}']")
+    if link and link.get("href"):
+        return absolute_url(link["href"])
+    return None
+
+
+def parse_listing(html: str) -> Tuple[List[str], Optional[str]]:
+    """Publication URLs of one listing page and the next page's URL"""
+    soup = make_soup(html, LISTING)
+    pub_links = soup.select(".list-results .list-result-item h3 a")
+    next_link = soup.select_one(".pages .nextLink, a[rel='next'], .pagination .next")
+    next_url = absolute_url(next_link.get("href")) if next_link else None
+    return [absolute_url(a.get("href")) for a in pub_links if a.get("href")], next_url
+
+
+def parse_publication(html: str, pub_url: str) -> Optional[Dict[str, Any]]:
+    """Extract publication fields from a detail page, None without member authors"""
+    return extract_publication(make_soup(html, PUBLICATION), pub_url)
+
+
+def extract_publication(soup: BeautifulSoup, pub_url: str) -> Optional[Dict[str, Any]]:
+    pub_data = {
+        "title": "",
+        "pub_link": pub_url,
+        "authors": [],
+        "author_profiles": [],
+        "year": "",
+        "abstract": "",
+        "doi": "",
+        "pdf_link": "",
+        "keywords": "",
+        "fingerprints": "",
+        "content": "",
+        "last_crawled": "",
+        "year_only": "",
+    }
+
+    title_elem = soup.find("h1", id="firstheading") or soup.select_one("h1")
+    pub_data["title"] = title_elem.get_text(strip=True) if title_elem else "No Title"
+    author_links = soup.select(".introduction p a[href*='/en/persons']")
+
+    # Verify if there is at least one member author
+    if not author_links:
+        return None
+
+    for a in author_links:
+        name = a.get_text(strip=True)
+        if name and len(name) > 1:
+            pub_data["authors"].append(name)
+            pub_data["author_profiles"].append(absolute_url(a.get("href", "")))
+
+    # Add non-member authors as well
+    non_member_authors_p_tag = soup.select_one(".introduction .relations.persons")
+    non_member_authors = (
+        "".join(non_member_authors_p_tag.find_all(string=True, recursive=False))
+        if non_member_authors_p_tag
+        else ""
+    ).strip()
+    if non_member_authors:
+        # non_member_authors_list = non_member_authors.strip(", ").split(",")
+        pub_data["authors"].extend(
+            a.strip() for a in non_member_authors.split(",") if a.strip()
+        )
+
+    year_elem = soup.select_one("[class*='details'] .properties .status td .date")
+    if year_elem:
+        logger.info("Year located.")
+        pub_data["year"] = year_elem.get_text(strip=True) if year_elem else "N/A"
+        pub_data["year_only"] = extract_year(pub_data["year"])
+
+    abstract_elem = soup.select_one("[class*='abstract'], .description, p.abstract")
+    if abstract_elem:
+        logger.info("Abstract located.")
+        pub_data["abstract"] = (
+            abstract_elem.get_text(strip=True) if abstract_elem else ""
+        )
+
+    doi_elem = soup.select_one("a[title*='DOI'], [href*='doi.org']")
+    if doi_elem:
+        pub_data["doi"] = doi_elem.get("href", "") if doi_elem else ""
+
+    pdf_elem = soup.select_one("a[href*='.pdf'], [title*='PDF']")
+    if pdf_elem:
+        pub_data["pdf_link"] = pdf_elem.get("href", "") if pdf_elem else ""
+
+    keyword_elem = retrieve_keywords(soup)
+    pub_data["keywords"] = keyword_elem if keyword_elem else ""
+    return pub_data
+
+
+def parse_page(kind: str, url: str, html: str) -> Dict[str, Any]:
+    """
+    Parse one fetched page into the links it leads to and, for detail
+    pages, the extracted fields. Pure, so it can run in a worker process.
+    """
+    if kind == ORGANISATION:
+        # One organisation-wide listing, every co-authored paper appears once
+        listing_url = submenu_link(make_soup(html, ORGANISATION), "publication")
+        return {"links": [(listing_url, LISTING)] if listing_url else []}
+    if kind == LISTING:
+        pub_urls, next_url = parse_listing(html)
+        links = [(pub_url, PUBLICATION) for pub_url in pub_urls]
+        if next_url:
+            links.append((next_url, LISTING))
+        return {"links": links}
+    if kind == PUBLICATION:
+        return {"pub": parse_publication(html, url)}
+    if kind == FINGERPRINTS:
+        return {"fingerprints": parse_fingerprints(html)}
+    raise ValueError(f"Unknown page kind: {kind}")
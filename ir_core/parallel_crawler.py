@@ -0,0 +1,536 @@
+import os
+import queue
+import logging
+import threading
+import time
+import multiprocessing
+import requests
+
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Set, Tuple
+
+from ir_core.crawler_main import (
+    FINGERPRINTS_READY,
+    HTTP_TIMEOUT,
+    LISTING_READY,
+    ORGANISATION_READY,
+    PUBLICATION_READY,
+    USER_AGENT,
+    finish_publication,
+    load_page,
+    robots_txt_satisfied,
+    save_publications,
+    setup_driver,
+)
+from ir_core.corpus_file import CorpusFile
+from ir_core.crawl_journal import CHECKPOINT_INTERVAL, CrawlJournal
+from ir_core.crawl_state import (
+    TIME_FORMAT,
+    is_fresh,
+    load_crawl_state,
+    publication_hash,
+    save_crawl_state,
+    validators,
+)
+from ir_core.frontier import URLFrontier
+from ir_core.page_archive import PageArchive
+from ir_core.page_parser import (
+    FINGERPRINTS,
+    LISTING,
+    ORGANISATION,
+    PUBLICATION,
+    fingerprints_url,
+    parse_page,
+)
+from ir_core.rate_limiter import AdaptiveRateLimiter
+
+logger = logging.getLogger(__name__)
+
+CRAWL_WORKERS = 4
+CRAWL_MODE = "parallel"
+PARSE_PROCESSES = max(1, (os.cpu_count() or 2) - 1)
+# Fetched pages per parser process that may wait before fetchers pause
+PARSE_BACKLOG = 4
+
+READY_SELECTORS = {
+    ORGANISATION: ORGANISATION_READY,
+    LISTING: LISTING_READY,
+    PUBLICATION: PUBLICATION_READY,
+    FINGERPRINTS: FINGERPRINTS_READY,
+}
+
+
+class HttpFetcher:
+    """Plain HTTP fetcher, enough for the server-rendered portal pages"""
+
+    def __init__(self, limiter: AdaptiveRateLimiter):
+        self.limiter = limiter
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+
+    def request(self, url: str, headers: Dict[str, str] = None) -> requests.Response:
+        self.limiter.acquire(url)
+        started = time.monotonic()
+        ok = False
+        try:
+            resp = self.session.get(url, headers=headers, timeout=HTTP_TIMEOUT)
+            # Throttling and server errors slow the crawl down, a 404 does not
+            ok = resp.status_code < 500 and resp.status_code != 429
+            resp.raise_for_status()
+            return resp
+        finally:
+            self.limiter.record(url, time.monotonic() - started, ok)
+
+    def get(self, url: str, ready_selector: str = None) -> str:
+        return self.request(url).text
+
+    def get_if_modified(
+        self, url: str, entry: Optional[Dict[str, Any]], ready_selector: str = None
+    ) -> Tuple[Optional[str], Dict[str, str]]:
+        """Conditional GET: (None, {}) on 304, else the page and its validators"""
+        resp = self.request(url, validators(entry))
+        if resp.status_code == 304:
+            return None, {}
+        return resp.text, {
+            "etag": resp.headers.get("ETag"),
+            "last_modified": resp.headers.get("Last-Modified"),
+        }
+
+    def close(self):
+        self.session.close()
+
+
+class BrowserFetcher:
+    """One Selenium browser per worker, for pages that need JavaScript"""
+
+    def __init__(self, limiter: AdaptiveRateLimiter, headless: bool = True):
+        self.limiter = limiter
+        self.driver, _ = setup_driver(headless)
+
+    def get(self, url: str, ready_selector: str = None) -> str:
+        load_page(self.driver, url, ready_selector, self.limiter)
+        return self.driver.page_source
+
+    def get_if_modified(
+        self, url: str, entry: Optional[Dict[str, Any]], ready_selector: str = None
+    ) -> Tuple[Optional[str], Dict[str, str]]:
+        # A browser cannot send validators, change detection falls to the hash
+        return self.get(url, ready_selector), {}
+
+    def close(self):
+        self.driver.quit()
+
+
+class CrawlRun:
+    """State shared by the workers of one crawl"""
+
+    def __init__(
+        self,
+        previous: CorpusFile,
+        state: Dict[str, Dict[str, Any]],
+        incremental: bool,
+        journal: CrawlJournal,
+        archive: PageArchive,
+    ):
+        self.previous = previous
+        self.state = state
+        self.incremental = incremental
+        self.journal = journal
+        self.archive = archive
+        self.now = datetime.now()
+        self.timestamp = self.now.strftime(TIME_FORMAT)
+        # Publications themselves only live in the journal
+        self.links: Set[str] = set()
+        self.changed: Set[str] = set()
+        self.listing_errors = 0
+        self.last_checkpoint = 0.0
+        self.lock = threading.Lock()
+
+    def add(self, pub: Dict[str, Any], changed: bool) -> None:
+        link = pub["pub_link"]
+        self.journal.append(
+            {"pub": pub, "changed": changed, "state": self.state.get(link, {})}
+        )
+        with self.lock:
+            self.links.add(link)
+            if changed:
+                self.changed.add(link)
+
+    def publication_done(self, pub: Dict[str, Any]) -> None:
+        """Journal an analyzed publication, flagging it if its content changed"""
+        link = pub["pub_link"]
+        with self.lock:
+            entry = self.state.setdefault(link, {})
+        known = self.previous.get(link) if self.incremental else None
+        digest = publication_hash(pub)
+        changed = not known or entry.get("hash") != digest
+        entry["hash"] = digest
+        self.add(pub, changed)
+
+    def failed(self, kind: str, url: str, error: Exception) -> None:
+        logger.warning(f"Error crawling {kind} {url}: {error}")
+        if kind not in (PUBLICATION, FINGERPRINTS):
+            with self.lock:
+                self.listing_errors += 1
+
+    def replay(self) -> None:
+        """Pick up the publications journaled before the crawl was interrupted"""
+        for record in self.journal.records():
+            link = record["pub"]["pub_link"]
+            self.links.add(link)
+            if record["changed"]:
+                self.changed.add(link)
+            self.state[link] = record["state"]
+
+    def maybe_checkpoint(self, frontier: URLFrontier) -> None:
+        now = time.monotonic()
+        with self.lock:
+            if now - self.last_checkpoint < CHECKPOINT_INTERVAL:
+                return
+            self.last_checkpoint = now
+            listing_errors = self.listing_errors
+        self.journal.checkpoint(
+            CRAWL_MODE,
+            {
+                "frontier": frontier.snapshot(),
+                "listing_errors": listing_errors,
+                "crawl": self.archive.crawl_id,
+            },
+        )
+
+
+class CrawlPipeline:
+    """
+    Parse and analyze stages behind the fetch workers. Pages are parsed in
+    a process pool, so CPU-bound parsing never holds up a fetch; one thread
+    analyzes the extracted publications and journals them.
+
+    A publication and its fingerprints page are fetched side by side and
+    joined by publication URL before analysis. A frontier item stays in
+    flight until its page has gone through every stage, which keeps
+    frontier checkpoints consistent with the journal.
+    """
+
+    def __init__(
+        self,
+        frontier: URLFrontier,
+        crawl_run: CrawlRun,
+        parse_processes: int = PARSE_PROCESSES,
+    ):
+        self.frontier = frontier
+        self.crawl_run = crawl_run
+        # Spawned, forking a process that runs fetch threads is unsafe
+        self.parse_pool = ProcessPoolExecutor(
+            parse_processes, mp_context=multiprocessing.get_context("spawn")
+        )
+        self.parse_slots = threading.BoundedSemaphore(parse_processes * PARSE_BACKLOG)
+        self.analyze_queue: queue.Queue = queue.Queue()
+        self.analyzer = threading.Thread(target=self._analyze, daemon=True)
+        # Publication URL -> the halves of a publication fetched so far
+        self.joins: Dict[str, Dict[str, Any]] = {}
+        self.joins_lock = threading.Lock()
+        # Set when the parse processes die, crawl_parallel raises it
+        self.error: Optional[BaseException] = None
+
+    def start(self) -> None:
+        self.analyzer.start()
+
+    def close(self) -> None:
+        self.analyze_queue.put(None)
+        self.analyzer.join()
+        self.parse_pool.shutdown()
+
+    def done(self, item: Tuple[str, str, Any]) -> None:
+        self.frontier.task_done(item)
+        self.crawl_run.maybe_checkpoint(self.frontier)
+
+    def fetch_fingerprints(self, pub_url: str) -> None:
+        """Have the next idle worker fetch the fingerprints of `pub_url`"""
+        with self.joins_lock:
+            self.joins[pub_url] = {"items": []}
+        self.frontier.push(fingerprints_url(pub_url), FINGERPRINTS, pub_url)
+
+    def parse(self, item: Tuple[str, str, Any], html: str) -> None:
+        """Queue a fetched page for parsing, blocks while the parsers are behind"""
+        url, kind, _ = item
+        self.parse_slots.acquire()
+        try:
+            future = self.parse_pool.submit(parse_page, kind, url, html)
+        except Exception as e:
+            self.parse_slots.release()
+            if isinstance(e, BrokenProcessPool):
+                self.abort(e)
+            else:
+                self.fetch_failed(item, e)
+            return
+        future.add_done_callback(lambda f: self._parsed(item, f))
+
+    def abort(self, error: BaseException) -> None:
+        """
+        Stop the crawl once the parse pool is broken. Unparsed pages stay in
+        flight, so the frontier checkpoint keeps them for a resumed crawl.
+        """
+        with self.joins_lock:
+            if self.error is not None:
+                return
+            self.error = error
+        logger.error(f"Parse processes failed, stopping the crawl: {error}")
+        self.frontier.stop()
+
+    def fetch_failed(self, item: Tuple[str, str, Any], error: Exception) -> None:
+        url, kind, _ = item
+        if kind == FINGERPRINTS:
+            # Not every publication has fingerprints, keep it without
+            logger.info(f"No fingerprints at {url}: {error}")
+        else:
+            self.crawl_run.failed(kind, url, error)
+        self.page_done(item, None)
+
+    def _parsed(self, item: Tuple[str, str, Any], future: Future) -> None:
+        self.parse_slots.release()
+        url, kind, _ = item
+        try:
+            result = future.result()
+        except BrokenProcessPool as e:
+            self.abort(e)
+            return
+        except Exception as e:
+            self.crawl_run.failed(kind, url, e)
+            result = None
+        if kind not in (PUBLICATION, FINGERPRINTS):
+            for link, link_kind in result["links"] if result else []:
+                self.frontier.add(link, link_kind)
+        self.page_done(item, result)
+
+    def page_done(
+        self, item: Tuple[str, str, Any], result: Optional[Dict[str, Any]]
+    ) -> None:
+        """Join the halves of a publication, anything else is simply done"""
+        url, kind, payload = item
+        if kind == PUBLICATION:
+            self._join(url, item, "pub", result and result["pub"])
+        elif kind == FINGERPRINTS:
+            self._join(payload, item, "fingerprints", result and result["fingerprints"])
+        else:
+            self.done(item)
+
+    def _join(
+        self, pub_url: str, item: Tuple[str, str, Any], half: str, value: Any
+    ) -> None:
+        with self.joins_lock:
+            join = self.joins.get(pub_url)
+            if join is not None:
+                join["items"].append(item)
+                join[half] = value
+                if "pub" not in join or "fingerprints" not in join:
+                    return
+                del self.joins[pub_url]
+        if join is None:
+            self.done(item)
+        elif join["pub"] is None:
+            for joined_item in join["items"]:
+                self.done(joined_item)
+        else:
+            self.analyze_queue.put(join)
+
+    def _analyze(self) -> None:
+        while True:
+            join = self.analyze_queue.get()
+            if join is None:
+                break
+            pub = join["pub"]
+            try:
+                self.crawl_run.publication_done(
+                    finish_publication(pub, join["fingerprints"])
+                )
+            except Exception as e:
+                logger.warning(f"Error analyzing {pub.get('pub_link')}: {e}")
+            finally:
+                for item in join["items"]:
+                    self.done(item)
+
+
+class FetchWorker(threading.Thread):
+    """Only moves bytes: takes URLs off the frontier, hands pages to the parsers"""
+
+    def __init__(self, frontier: URLFrontier, fetcher, pipeline: CrawlPipeline):
+        super().__init__(daemon=True)
+        self.frontier = frontier
+        self.fetcher = fetcher
+        self.pipeline = pipeline
+        self.crawl_run = pipeline.crawl_run
+
+    def run(self):
+        try:
+            while True:
+                item = self.frontier.get()
+                if item is None:
+                    break
+                try:
+                    html = self.fetch(item)
+                except Exception as e:
+                    self.pipeline.fetch_failed(item, e)
+                    continue
+                if html is None:
+                    self.pipeline.page_done(item, None)
+                else:
+                    self.pipeline.parse(item, html)
+        finally:
+            self.fetcher.close()
+
+    def fetch(self, item: Tuple[str, str, Any]) -> Optional[str]:
+        url, kind, _ = item
+        if kind == PUBLICATION:
+            html = self.fetch_publication(url)
+        else:
+            html = self.fetcher.get(url, READY_SELECTORS.get(kind))
+        if html is not None:
+            self.crawl_run.archive.store(url, kind, html)
+        return html
+
+    def fetch_publication(self, pub_url: str) -> Optional[str]:
+        """The detail page, or None when the last crawl's copy is still good"""
+        crawl_run = self.crawl_run
+        with crawl_run.lock:
+            entry = crawl_run.state.setdefault(pub_url, {})
+        entry["last_seen"] = crawl_run.timestamp
+        known = crawl_run.previous.get(pub_url) if crawl_run.incremental else None
+        # Reparse rebuilds the corpus from one crawl's archive records, so a
+        # publication without an archived copy is fetched again as if new
+        if known and not self.is_archived(pub_url):
+            known = None
+        if known and is_fresh(entry, crawl_run.now):
+            self.keep(pub_url, known)
+            return None
+
+        # A new publication is surely fetched, so its fingerprints are fetched
+        # alongside; a known one only once the page turns out modified
+        if not known:
+            self.pipeline.fetch_fingerprints(pub_url)
+        html, response_validators = self.fetcher.get_if_modified(
+            pub_url, entry if known else None, PUBLICATION_READY
+        )
+        entry["last_fetched"] = crawl_run.timestamp
+        if html is None:
+            logger.info(f"Not modified: {pub_url}")
+            self.keep(pub_url, known)
+            return None
+        if known:
+            self.pipeline.fetch_fingerprints(pub_url)
+        entry.update(response_validators)
+        return html
+
+    def is_archived(self, pub_url: str) -> bool:
+        archive = self.crawl_run.archive
+        return archive.archived(pub_url) and archive.archived(fingerprints_url(pub_url))
+
+    def keep(self, pub_url: str, known: Dict[str, Any]) -> None:
+        """Journal the last crawl's copy and record it under this crawl"""
+        self.crawl_run.add(known, changed=False)
+        self.crawl_run.archive.revisit(pub_url, PUBLICATION)
+        self.crawl_run.archive.revisit(fingerprints_url(pub_url), FINGERPRINTS)
+
+
+def crawl_parallel(
+    base_url: str,
+    org_url: str,
+    workers: int = CRAWL_WORKERS,
+    use_browser: bool = True,
+    headless: bool = True,
+    limiter: AdaptiveRateLimiter = None,
+    incremental: bool = True,
+    resume: bool = True,
+    parse_processes: int = PARSE_PROCESSES,
+) -> List[Dict[str, Any]]:
+    """
+    Crawl the organisation's publication listing with `workers` fetchers
+    sharing one deduplicated frontier, so each publication is requested
+    once however many members co-authored it. All of them draw from one
+    rate limiter, so politeness is per host, not per worker. Parsing and
+    analysis run in the CrawlPipeline stages behind them.
+
+    Incremental crawls still walk every listing, but only fetch publications
+    that are new, past RECRAWL_AFTER or modified according to their HTTP
+    validators, and only re-index the ones whose content changed.
+
+    Publications are journaled as they are crawled and the frontier is
+    checkpointed, so an interrupted crawl resumes where it stopped. Every
+    fetched page goes into the PageArchive for offline reparsing.
+    """
+    if not robots_txt_satisfied(base_url):
+        raise ValueError("Crawling disallowed by robots.txt")
+
+    limiter = limiter or AdaptiveRateLimiter()
+    journal = CrawlJournal()
+    checkpoint = journal.start(CRAWL_MODE, resume)
+    # The last corpus stays on disk, records are read back only when reused
+    previous = CorpusFile()
+    # A resumed crawl keeps archiving under its original crawl id
+    archive = PageArchive(crawl_id=checkpoint.get("crawl") if checkpoint else None)
+    crawl_run = CrawlRun(previous, load_crawl_state(), incremental, journal, archive)
+    if checkpoint:
+        # Fingerprints are pushed again when their publication is re-fetched
+        checkpoint["frontier"]["pending"] = [
+            item
+            for item in checkpoint["frontier"]["pending"]
+            if item[1] != FINGERPRINTS
+        ]
+        frontier = URLFrontier.restore(checkpoint["frontier"])
+        crawl_run.replay()
+        crawl_run.listing_errors = checkpoint["listing_errors"]
+        print(
+            f"Resuming crawl: {len(crawl_run.links)} publications journaled, "
+            f"{len(frontier)} pages pending"
+        )
+    else:
+        frontier = URLFrontier()
+        frontier.add(org_url, ORGANISATION)
+
+    print(f"Starting {workers} fetch workers, {parse_processes} parse processes ...")
+    started = time.perf_counter()
+    pipeline = CrawlPipeline(frontier, crawl_run, parse_processes)
+    pipeline.start()
+    pool = []
+    try:
+        for _ in range(workers):
+            fetcher = (
+                BrowserFetcher(limiter, headless)
+                if use_browser
+                else HttpFetcher(limiter)
+            )
+            pool.append(FetchWorker(frontier, fetcher, pipeline))
+        for worker in pool:
+            worker.start()
+        for worker in pool:
+            worker.join()
+    finally:
+        pipeline.close()
+    if pipeline.error is not None:
+        # Journal and checkpoint are kept, running the crawl again resumes it
+        raise RuntimeError("Crawl stopped, parse processes failed") from pipeline.error
+
+    print(
+        f"Visited {frontier.seen} pages in {time.perf_counter() - started:.0f}s, "
+        f"{len(crawl_run.links)} publications, "
+        f"{len(crawl_run.changed)} fetched as changed"
+    )
+    if crawl_run.listing_errors:
+        # Publications may be missing only because their listing failed
+        for key in previous:
+            if key in crawl_run.links:
+                continue
+            pub = previous[key]
+            if pub.get("pub_link") not in crawl_run.links:
+                crawl_run.add(pub, changed=False)
+    save_crawl_state(crawl_run.state)
+    try:
+        if incremental:
+            publications = save_publications(journal, previous, crawl_run.changed)
+        else:
+            publications = save_publications(journal)
+    finally:
+        previous.close()
+    journal.finish()
+    return publications
@@ -1,103 +1,124 @@
-import json
+from typing import List, Dict, Optional
 
-from typing import List, Dict
-from collections import defaultdict
+from ir_core.proximity import count_positional_matches, gallop_intersect
+from ir_core.topk import wand_top_k
+from ir_core.timing import span
+from ir_core.segment_index import (
+    SegmentedPositionalIndex,
+    load_manifest,
+    manifest_is_current,
+    rebuild_segments,
+    update_segments,
+)
+from constants.constants import INDEX_FILE_PATH, SEGMENT_MANIFEST_FILE
 
-from ir_core.preprocessors.preprocess import preprocess
-from constants.constants import INDEX_FILE_POSITIONAL
 
+def build_positional_index(docs: List[Dict]) -> None:
+    """Full rebuild of the positional index into a single segment"""
+    rebuild_segments(docs)
+
+
+def update_positional_index(
+    docs: List[Dict],
+    changed_docs: Optional[List[Dict]] = None,
+    deleted_keys: Optional[List[str]] = None,
+) -> Dict[str, int]:
+    """Index only new/changed publications and tombstone removed ones"""
+    return update_segments(docs, changed_docs, deleted_keys)
+
+
+def positional_index_exists() -> bool:
+    return SEGMENT_MANIFEST_FILE.exists()
 
-def build_positional_index(docs: List[Dict]) -> Dict:
-    """
-    Tokenize each word, record positions.
-    """
-    postings: Dict[str, Dict[int, List[int]]] = defaultdict(lambda: defaultdict(list))
 
-    for doc_id, doc in enumerate(docs):
-        tokens = preprocess(doc.get("content", doc["title"])).split()
-        for pos, token in enumerate(tokens):
-            postings[token][doc_id].append(pos)
+def positional_index_needs_rebuild() -> bool:
+    """No index yet, or one built by an older analyzer"""
+    return not manifest_is_current(load_manifest())
 
-    with open(INDEX_FILE_POSITIONAL, "w") as f:
-        json.dump({term: dict(postings[term]) for term in postings}, f)
+
+def positional_index_is_stale() -> bool:
+    """Publications were saved after the last index update"""
+    if not positional_index_exists() or not INDEX_FILE_PATH.exists():
+        return False
+    return SEGMENT_MANIFEST_FILE.stat().st_mtime < INDEX_FILE_PATH.stat().st_mtime
 
 
 def load_positional_index() -> Dict:
-    if INDEX_FILE_POSITIONAL.exists():
-        with open(INDEX_FILE_POSITIONAL) as f:
-            return json.load(f)
-    return {}
+    """Open every live segment of the positional index"""
+    for _ in range(3):
+        manifest = load_manifest()
+        if manifest is None:
+            return {}
+        try:
+            return SegmentedPositionalIndex(manifest)
+        except FileNotFoundError:
+            # A background merge replaced a segment, re-read the manifest
+            continue
+    raise RuntimeError("Positional index segments keep changing, try again")
 
 
 def intersect_postings(post1: List[int], post2: List[int]) -> List[int]:
     """Intersect sorted doc lists"""
-    i, j, common = 0, 0, []
-    while i < len(post1) and j < len(post2):
-        if post1[i] == post2[i]:
-            common.append(post1[i])
-            i += 1
-            j += 1
-        elif post1[i] < post2[j]:
-            i += 1
-        else:
-            j += 1
-    return common
+    return gallop_intersect(post1, post2)
 
 
 def phrase_search(
-    postings: Dict, phrase: str, docs: List[Dict], top_k: int = 10, window: int = 5
+    postings: Dict,
+    phrase: str,
+    docs: List[Dict],
+    top_k: int = 10,
+    window: int = 5,
+    ordered: bool = True,
 ) -> List[Dict]:
+    """
+    Rank docs by phrase occurrences. Term i must sit within `window` of the
+    anchor position + i (window 0 is an exact phrase); with ordered=False
+    every term only needs to be within `window` of the anchor (NEAR/k).
+    """
     tokens = phrase.split()
     if len(tokens) == 0:
         return []
 
-    # Get candidate docs: intersect all term postings
-    candidate_docs = list(postings.get(tokens[0], {}).keys())
-    for token in tokens[1:]:
-        next_docs = list(postings.get(token, {}).keys())
-        candidate_docs = sorted(set(candidate_docs) & set(next_docs))
-        # candidate_docs = intersect_postings(candidate_docs, next_docs)
-
-    scored_results = []
-    for doc_id in candidate_docs:
-        doc_post_lists = [
-            postings[token][doc_id] for token in tokens if doc_id in postings[token]
+    term_postings = []
+    with span("postings"):
+        for token in tokens:
+            token_postings = postings.get(token)
+            if not token_postings:
+                return []
+            term_postings.append(token_postings)
+
+    # Get candidate docs: postings come with ascending doc ids, so walking the
+    # rarest term and probing the others keeps them sorted without copies
+    with span("candidates"):
+        rarest = min(term_postings, key=len)
+        others = [p for p in term_postings if p is not rarest]
+        candidate_docs = [
+            doc_id for doc_id in rarest if all(doc_id in p for p in others)
         ]
-        if len(doc_post_lists) != len(tokens):
-            continue
-
-        # Check phrase proximity for each occurrence
-        matches = 0
-        for start_pos in doc_post_lists[0]:  # Anchor to first term
-            positions_match = True
-            for i in range(1, len(tokens)):
-                # expected_pos = start_pos + i  # Exact phrase len
-                expected_pos = [
-                    p for p in doc_post_lists[i] if abs(p - (start_pos + i)) <= window
-                ]
-                # if expected_pos not in doc_post_lists[i]:
-                if not expected_pos:
-                    positions_match = False
-                    break
-            if positions_match:
-                matches += 1
-
-        if matches > 0:
-            score = matches / len(tokens)  # Normalized freq
-            scored_results.append((score, doc_id))
-
-    # Rank & return
-    scored_results.sort(reverse=True)
-    results = []
-    for score, doc_id in scored_results[:top_k]:
-        doc = docs[int(doc_id)]
-        results.append(
-            {
-                **doc,
-                "relevancy_score": float(score),
-                "phrase_matches": int(score * len(tokens)),
-            }
-        )
+    offsets = list(range(len(tokens))) if ordered else [0] * len(tokens)
+
+    with span("scoring"):
+        scored_results = []
+        for doc_id in candidate_docs:
+            doc_post_lists = [p[doc_id] for p in term_postings]
+            matches = count_positional_matches(doc_post_lists, offsets, window)
+            if matches > 0:
+                score = matches / len(tokens)  # Normalized freq
+                scored_results.append((score, doc_id))
+
+        # Rank & return
+        scored_results.sort(reverse=True)
+    with span("materialize"):
+        results = []
+        for score, doc_id in scored_results[:top_k]:
+            doc = docs[int(doc_id)]
+            results.append(
+                {
+                    **doc,
+                    "relevancy_score": float(score),
+                    "phrase_matches": int(score * len(tokens)),
+                }
+            )
     return results
 
 
@@ -107,18 +128,22 @@ def keyword_search(
     """Fallback: union + TF"""
     print("Fallback search: Keyword Search")
     tokens = set(query.split())
-    doc_scores = defaultdict(float)
-
-    for token in tokens:
-        for doc_id, positions in postings.get(token, {}).items():
-            tf = len(positions)
-            doc_scores[doc_id] += tf
-
-    scored = sorted(
-        [(score / max(1, len(tokens)), doc_id) for doc_id, score in doc_scores.items()],
-        reverse=True,
-    )
-    results = []
-    for score, doc_id in scored[:top_k]:
-        results.append({**docs[int(doc_id)], "relevancy_score": float(score)})
+    term_postings = []
+    with span("postings"):
+        for token in tokens:
+            token_postings = postings.get(token)
+            if not token_postings:
+                continue
+            tfs = [len(positions) for positions in token_postings.values()]
+            # Stored bound when the index has one, else from the decoded postings
+            max_tf = postings.max_tf(token) if hasattr(postings, "max_tf") else max(tfs)
+            term_postings.append((list(token_postings), tfs, max_tf))
+
+    with span("scoring"):
+        top = wand_top_k(term_postings, top_k)
+    with span("materialize"):
+        results = []
+        for score, doc_id in top:
+            score = score / max(1, len(tokens))
+            results.append({**docs[int(doc_id)], "relevancy_score": float(score)})
     return results
@@ -0,0 +1,66 @@
+import re
+
+from functools import lru_cache
+from typing import List, Dict, Any
+
+from ir_core.preprocessors.stopwords import ENGLISH_STOP_WORDS
+
+# Bump whenever analysis output changes, stored indexes are rebuilt on mismatch
+ANALYZER_VERSION = 2
+STEM_CACHE_SIZE = 100_000
+
+NON_WORD_PATTERN = re.compile(r"[^\w\s]")
+
+STOP_WORDS = ENGLISH_STOP_WORDS
+
+# Importing nltk costs more than a second, so the stemmer is created on first use
+_stemmer = None
+
+
+def get_stemmer():
+    global _stemmer
+    if _stemmer is None:
+        from nltk.stem.porter import PorterStemmer
+
+        _stemmer = PorterStemmer()
+    return _stemmer
+
+
+@lru_cache(maxsize=STEM_CACHE_SIZE)
+def stem(token: str) -> str:
+    """PorterStemmer.stem, memoized per token"""
+    return get_stemmer().stem(token)
+
+
+def tokenize(text: str) -> List[str]:
+    """Tokenize, lowercase, remove punctuations and stopwords"""
+    tokens = NON_WORD_PATTERN.sub(" ", text.lower()).split()
+    return [t for t in tokens if t not in STOP_WORDS and len(t) > 2]
+
+
+def analyze(text: str) -> List[str]:
+    """Full analysis shared by documents and queries"""
+    return [stem(t) for t in tokenize(text)]
+
+
+def publication_text(pub: Dict[str, Any]) -> str:
+    """Raw searchable text of a crawled publication"""
+    keywords = (pub.get("keywords") or "").replace(",", " ")
+    fingerprints = (pub.get("fingerprints") or "").replace(",", " ")
+    return (
+        f"{pub.get('title', '')} {' '.join(pub.get('authors', []))} "
+        f"{pub.get('year', '')} {pub.get('abstract', '')} {keywords} {fingerprints}"
+    )
+
+
+def analyze_publication(pub: Dict[str, Any]) -> str:
+    """Analyze a publication once; the result is persisted as its `content`"""
+    return " ".join(analyze(publication_text(pub)))
+
+
+def document_tokens(doc: Dict[str, Any]) -> List[str]:
+    """The persisted token stream every index builder consumes"""
+    content = doc.get("content")
+    if content:
+        return content.split()
+    return analyze(doc.get("title", ""))
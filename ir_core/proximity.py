@@ -0,0 +1,89 @@
+import re
+
+from bisect import bisect_left
+from typing import List, Sequence, Tuple
+
+# a NEAR/3 b -> terms within 3 positions of each other, in any order
+NEAR_PATTERN = re.compile(r"\bNEAR/(\d+)\b", re.IGNORECASE)
+
+
+def gallop(arr: Sequence[int], target: int, lo: int = 0) -> int:
+    """First index >= lo whose value is >= target (exponential + binary search)"""
+    n = len(arr)
+    step = 1
+    hi = lo
+    while hi < n and arr[hi] < target:
+        lo = hi + 1
+        hi += step
+        step *= 2
+    return bisect_left(arr, target, lo, min(hi, n))
+
+
+def gallop_intersect(post1: Sequence[int], post2: Sequence[int]) -> List[int]:
+    """Intersect two sorted lists, skipping through the longer one"""
+    if len(post1) > len(post2):
+        post1, post2 = post2, post1
+    common = []
+    j, n = 0, len(post2)
+    for doc_id in post1:
+        j = gallop(post2, doc_id, j)
+        if j == n:
+            break
+        if post2[j] == doc_id:
+            common.append(doc_id)
+            j += 1
+    return common
+
+
+def intersect_many(doc_lists: List[Sequence[int]]) -> List[int]:
+    """Intersect sorted doc lists, rarest first so the result shrinks early"""
+    if not doc_lists:
+        return []
+    ordered = sorted(doc_lists, key=len)
+    common = list(ordered[0])
+    for doc_list in ordered[1:]:
+        if not common:
+            break
+        common = gallop_intersect(common, doc_list)
+    return common
+
+
+def count_positional_matches(
+    position_lists: List[Sequence[int]], offsets: Sequence[int], window: int
+) -> int:
+    """
+    Count anchor positions p of the first term such that every other term i
+    has a position within `window` of p + offsets[i].
+
+    Anchors are visited in order and every cursor only moves forward, so the
+    join is one pass over all position lists.
+    """
+    anchors = position_lists[0]
+    cursors = [0] * len(position_lists)
+    matches = 0
+    for p in anchors:
+        for i in range(1, len(position_lists)):
+            positions = position_lists[i]
+            target = p + offsets[i]
+            j = bisect_left(positions, target - window, cursors[i])
+            cursors[i] = j
+            if j == len(positions) or positions[j] > target + window:
+                break
+        else:
+            matches += 1
+    return matches
+
+
+def parse_proximity_query(query: str) -> Tuple[str, int, bool]:
+    """
+    Split a raw query into (text, window, ordered).
+    "exact phrase" -> window 0, a NEAR/k b -> window k in any order,
+    anything else keeps window -1 (caller default).
+    """
+    query = query.strip()
+    if len(query) > 1 and query.startswith('"') and query.endswith('"'):
+        return query.strip('"'), 0, True
+    near = NEAR_PATTERN.search(query)
+    if near:
+        return NEAR_PATTERN.sub(" ", query), int(near.group(1)), False
+    return query, -1, True
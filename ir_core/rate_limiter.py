@@ -0,0 +1,84 @@
+import threading
+import time
+
+from typing import Dict
+from urllib.parse import urlsplit
+
+# Requests per second per host; the limiter moves between the bounds
+INITIAL_RATE = 1.0
+MIN_RATE = 0.1
+MAX_RATE = 4.0
+BURST = 2
+# Back off once responses get slower than this
+TARGET_LATENCY = 2.0  # seconds
+RATE_STEP = 0.1
+BACKOFF = 0.5
+LATENCY_SMOOTHING = 0.3
+
+
+class _Bucket:
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = float(BURST)
+        self.updated = time.monotonic()
+        self.latency = 0.0
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket per host with AIMD rate control: the rate creeps up while
+    the server answers quickly and is halved on errors or slow responses.
+    """
+
+    def __init__(
+        self,
+        initial_rate: float = INITIAL_RATE,
+        min_rate: float = MIN_RATE,
+        max_rate: float = MAX_RATE,
+        target_latency: float = TARGET_LATENCY,
+    ):
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.target_latency = target_latency
+        self._buckets: Dict[str, _Bucket] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, host: str) -> _Bucket:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = _Bucket(self.initial_rate)
+        return bucket
+
+    def acquire(self, url: str) -> float:
+        """Block until the host has a token, returns the time waited"""
+        host = urlsplit(url).netloc
+        waited = 0.0
+        while True:
+            with self._lock:
+                bucket = self._bucket(host)
+                now = time.monotonic()
+                bucket.tokens = min(
+                    BURST, bucket.tokens + (now - bucket.updated) * bucket.rate
+                )
+                bucket.updated = now
+                if bucket.tokens >= 1:
+                    bucket.tokens -= 1
+                    return waited
+                delay = (1 - bucket.tokens) / bucket.rate
+            time.sleep(delay)
+            waited += delay
+
+    def record(self, url: str, latency: float, ok: bool = True) -> None:
+        """Feed back one response so the host's rate can adapt"""
+        with self._lock:
+            bucket = self._bucket(urlsplit(url).netloc)
+            bucket.latency += LATENCY_SMOOTHING * (latency - bucket.latency)
+            if not ok or bucket.latency > self.target_latency:
+                bucket.rate = max(self.min_rate, bucket.rate * BACKOFF)
+            else:
+                bucket.rate = min(self.max_rate, bucket.rate + RATE_STEP)
+
+    def rate(self, url: str) -> float:
+        with self._lock:
+            return self._bucket(urlsplit(url).netloc).rate
@@ -0,0 +1,113 @@
+import os
+import sys
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+from constants.constants import INDEX_FILE_PATH, PAGE_ARCHIVE_PATH
+from ir_core.crawl_journal import CrawlJournal
+from ir_core.frontier import normalize_url
+from ir_core.index_manager import build_indexes
+from ir_core.index_service import load_index
+from ir_core.page_archive import PageArchive
+from ir_core.page_parser import (
+    FINGERPRINTS,
+    PUBLICATION,
+    fingerprints_url,
+    parse_page,
+)
+from ir_core.preprocessors.analyzer import analyze_publication
+
+# Nothing else runs during a reparse, so every core parses
+REPARSE_PROCESSES = os.cpu_count() or 1
+REPARSE_MODE = "reparse"
+
+# Each worker process opens the archive once
+_archive: Optional[PageArchive] = None
+
+
+def _init_worker(root: Path) -> None:
+    global _archive
+    _archive = PageArchive(root)
+
+
+def reparse_publication(
+    record: Dict[str, Any], fingerprints_digest: Optional[str]
+) -> Optional[Dict[str, Any]]:
+    """Extract and analyze one archived detail page and its fingerprints"""
+    url = record["url"]
+    result = parse_page(PUBLICATION, url, _archive.read(record["digest"]))
+    pub = result["pub"]
+    if pub is None:
+        return None
+    fingerprints = None
+    if fingerprints_digest:
+        fingerprints_html = _archive.read(fingerprints_digest)
+        fingerprints = parse_page(FINGERPRINTS, url, fingerprints_html)["fingerprints"]
+    pub["fingerprints"] = fingerprints if fingerprints else ""
+    pub["content"] = analyze_publication(pub)
+    pub["last_crawled"] = record["date"]
+    return pub
+
+
+def reparse(
+    crawl_id: str = None,
+    processes: int = REPARSE_PROCESSES,
+    root: Path = PAGE_ARCHIVE_PATH,
+) -> List[Dict[str, Any]]:
+    """
+    Rebuild publications.json and every index from the publications archived
+    by one crawl, the latest by default, without touching the network.
+    """
+    archive = PageArchive(root)
+    crawl_id = crawl_id or archive.latest_crawl()
+    if crawl_id is None:
+        raise ValueError(f"No archived pages in {root}")
+    # Fingerprints come from the same crawl, not the newest copy archived
+    pub_records = {}
+    fingerprints = {}
+    for record in archive.records():
+        if record["crawl"] != crawl_id:
+            continue
+        if record["kind"] == PUBLICATION:
+            pub_records[normalize_url(record["url"])] = record
+        elif record["kind"] == FINGERPRINTS:
+            fingerprints[normalize_url(record["url"])] = record["digest"]
+    fingerprints_digests = [
+        fingerprints.get(normalize_url(fingerprints_url(record["url"])))
+        for record in pub_records.values()
+    ]
+
+    print(f"Reparsing {len(pub_records)} publications of crawl {crawl_id} ...")
+    started = time.perf_counter()
+    journal = CrawlJournal(root / "reparse.jsonl", root / "reparse_checkpoint.json")
+    journal.start(REPARSE_MODE, resume=False)
+    try:
+        with ProcessPoolExecutor(
+            processes, initializer=_init_worker, initargs=(root,)
+        ) as pool:
+            for pub in pool.map(
+                reparse_publication,
+                pub_records.values(),
+                fingerprints_digests,
+                chunksize=16,
+            ):
+                if pub:
+                    journal.append({"pub": pub})
+        journal.compact(INDEX_FILE_PATH)
+    finally:
+        journal.finish()
+
+    docs = load_index()
+    build_indexes(docs)
+    print(
+        f"Reparsed {len(docs)} unique publications "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+    return docs
+
+
+if __name__ == "__main__":
+    reparse(sys.argv[1] if len(sys.argv) > 1 else None)
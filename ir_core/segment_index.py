@@ -0,0 +1,384 @@
+import os
+import json
+import math
+import hashlib
+import threading
+
+from collections import OrderedDict, defaultdict
+from collections.abc import Mapping
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+
+from ir_core.preprocessors.analyzer import ANALYZER_VERSION, document_tokens
+from ir_core.compact_index import (
+    DECODED_CACHE_SIZE,
+    CompactPositionalIndex,
+    write_compact_index,
+)
+from constants.constants import SEGMENTS_PATH, SEGMENT_MANIFEST_FILE, SEGMENT_LOCK_FILE
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Segments of the same size tier are merged once this many accumulate
+MERGE_FACTOR = 4
+
+_manifest_lock = threading.RLock()
+_lock_file = None
+_lock_depth = 0
+_merge_thread: Optional[threading.Thread] = None
+
+
+@contextmanager
+def _manifest_locked() -> Iterator[None]:
+    """
+    Exclusive access to the manifest and segment files across threads and
+    processes (crawler, scheduler, reparse). Reentrant within a thread.
+    """
+    global _lock_file, _lock_depth
+    with _manifest_lock:
+        if _lock_depth == 0:
+            SEGMENTS_PATH.mkdir(parents=True, exist_ok=True)
+            _lock_file = open(SEGMENT_LOCK_FILE, "a+")
+            if fcntl:
+                fcntl.flock(_lock_file.fileno(), fcntl.LOCK_EX)
+            else:
+                _lock_file.seek(0)
+                msvcrt.locking(_lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        _lock_depth += 1
+        try:
+            yield
+        finally:
+            _lock_depth -= 1
+            if _lock_depth == 0:
+                if fcntl:
+                    fcntl.flock(_lock_file.fileno(), fcntl.LOCK_UN)
+                else:
+                    _lock_file.seek(0)
+                    msvcrt.locking(_lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+                _lock_file.close()
+                _lock_file = None
+
+
+def doc_key(doc: Dict[str, Any]) -> str:
+    """Stable identity of a publication across crawls"""
+    return doc.get("pub_link") or doc["title"]
+
+
+def doc_fingerprint(doc: Dict[str, Any]) -> str:
+    return hashlib.sha1(doc.get("content", doc["title"]).encode("utf-8")).hexdigest()
+
+
+def _empty_manifest() -> Dict[str, Any]:
+    return {
+        "analyzer": ANALYZER_VERSION,
+        "next_doc_id": 0,
+        "next_segment": 0,
+        "docs": {},
+        "segments": [],
+        "tombstones": [],
+    }
+
+
+def load_manifest() -> Optional[Dict[str, Any]]:
+    if not SEGMENT_MANIFEST_FILE.exists():
+        return None
+    with open(SEGMENT_MANIFEST_FILE) as f:
+        return json.load(f)
+
+
+def manifest_is_current(manifest: Optional[Dict[str, Any]]) -> bool:
+    """Segments exist and were built with the current analyzer"""
+    return manifest is not None and manifest.get("analyzer") == ANALYZER_VERSION
+
+
+def _save_manifest(manifest: Dict[str, Any]) -> None:
+    tmp_path = SEGMENT_MANIFEST_FILE.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, SEGMENT_MANIFEST_FILE)
+
+
+def _segment_paths(name: str) -> Tuple[Path, Path]:
+    return SEGMENTS_PATH / f"{name}.dict", SEGMENTS_PATH / f"{name}.postings"
+
+
+def _write_segment(
+    manifest: Dict[str, Any],
+    postings: Dict[str, Dict[int, List[int]]],
+    doc_ids: List[int],
+) -> Dict[str, Any]:
+    name = f"seg_{manifest['next_segment']:06d}"
+    manifest["next_segment"] += 1
+    dict_path, postings_path = _segment_paths(name)
+    write_compact_index(postings, dict_path, postings_path)
+    return {
+        "name": name,
+        "doc_count": len(doc_ids),
+        "doc_ids": sorted(doc_ids),
+        "bytes": dict_path.stat().st_size + postings_path.stat().st_size,
+    }
+
+
+def _index_docs(
+    docs_with_ids: List[Tuple[int, Dict]],
+) -> Dict[str, Dict[int, List[int]]]:
+    """Tokenize each word, record positions."""
+    postings: Dict[str, Dict[int, List[int]]] = defaultdict(lambda: defaultdict(list))
+    for doc_id, doc in docs_with_ids:
+        for pos, token in enumerate(document_tokens(doc)):
+            postings[token][doc_id].append(pos)
+    return postings
+
+
+def _remove_segment_files(name: str) -> None:
+    for path in _segment_paths(name):
+        path.unlink(missing_ok=True)
+
+
+def rebuild_segments(docs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Full rebuild: every publication in one fresh segment"""
+    SEGMENTS_PATH.mkdir(parents=True, exist_ok=True)
+    with _manifest_locked():
+        old = load_manifest()
+        manifest = _empty_manifest()
+        if old:
+            # Keep segment names unique so open readers are never overwritten
+            manifest["next_segment"] = old["next_segment"]
+        docs_with_ids = []
+        for doc in docs:
+            key = doc_key(doc)
+            if key in manifest["docs"]:
+                continue
+            doc_id = manifest["next_doc_id"]
+            manifest["next_doc_id"] += 1
+            manifest["docs"][key] = {"id": doc_id, "hash": doc_fingerprint(doc)}
+            docs_with_ids.append((doc_id, doc))
+        if docs_with_ids:
+            manifest["segments"].append(
+                _write_segment(
+                    manifest, _index_docs(docs_with_ids), [i for i, _ in docs_with_ids]
+                )
+            )
+        _save_manifest(manifest)
+        if old:
+            for segment in old["segments"]:
+                _remove_segment_files(segment["name"])
+    return manifest
+
+
+def update_segments(
+    docs: List[Dict[str, Any]],
+    changed_docs: Optional[List[Dict[str, Any]]] = None,
+    deleted_keys: Optional[List[str]] = None,
+) -> Dict[str, int]:
+    """
+    Index only what changed since the last build: new and modified
+    publications go into a new segment, deleted or replaced ones are
+    tombstoned.
+
+    A caller that already knows the delta (the incremental crawler) passes
+    `changed_docs` and `deleted_keys`, then `docs` is only needed when the
+    segments have to be rebuilt from scratch.
+    """
+    with _manifest_locked():
+        manifest = load_manifest()
+        if not manifest_is_current(manifest):
+            manifest = rebuild_segments(docs)
+            return {"added": len(manifest["docs"]), "changed": 0, "deleted": 0}
+
+        tombstones = set(manifest["tombstones"])
+        seen = set()
+        docs_with_ids = []
+        added = changed = 0
+        for doc in docs if changed_docs is None else changed_docs:
+            key = doc_key(doc)
+            if key in seen:
+                continue
+            seen.add(key)
+            fingerprint = doc_fingerprint(doc)
+            entry = manifest["docs"].get(key)
+            if entry and entry["hash"] == fingerprint:
+                continue
+            if entry:
+                tombstones.add(entry["id"])
+                changed += 1
+            else:
+                added += 1
+            doc_id = manifest["next_doc_id"]
+            manifest["next_doc_id"] += 1
+            manifest["docs"][key] = {"id": doc_id, "hash": fingerprint}
+            docs_with_ids.append((doc_id, doc))
+
+        if changed_docs is None:
+            deleted = [key for key in manifest["docs"] if key not in seen]
+        else:
+            deleted = [key for key in deleted_keys or [] if key in manifest["docs"]]
+        for key in deleted:
+            tombstones.add(manifest["docs"].pop(key)["id"])
+
+        if docs_with_ids:
+            manifest["segments"].append(
+                _write_segment(
+                    manifest, _index_docs(docs_with_ids), [i for i, _ in docs_with_ids]
+                )
+            )
+        manifest["tombstones"] = sorted(tombstones)
+        _save_manifest(manifest)
+
+    print(
+        f"Incremental index update: {added} added, {changed} changed, "
+        f"{len(deleted)} deleted"
+    )
+    if docs_with_ids:
+        merge_segments_async()
+    return {"added": added, "changed": changed, "deleted": len(deleted)}
+
+
+def _size_tier(segment: Dict[str, Any]) -> int:
+    return int(math.log(max(segment["doc_count"], 1), MERGE_FACTOR))
+
+
+def merge_segments() -> int:
+    """
+    Compact segments by size tier, dropping tombstoned documents.
+    Returns the number of merges performed.
+    """
+    merges = 0
+    with _manifest_locked():
+        manifest = load_manifest()
+        if manifest is None:
+            return 0
+        while True:
+            tiers: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+            for segment in manifest["segments"]:
+                tiers[_size_tier(segment)].append(segment)
+            group = next(
+                (tiers[t] for t in sorted(tiers) if len(tiers[t]) >= MERGE_FACTOR),
+                None,
+            )
+            if group is None:
+                break
+
+            tombstones = set(manifest["tombstones"])
+            merged: Dict[str, Dict[int, List[int]]] = defaultdict(dict)
+            doc_ids = set()
+            for segment in group:
+                reader = CompactPositionalIndex(*_segment_paths(segment["name"]))
+                for term in reader:
+                    for doc_id, positions in reader[term].items():
+                        if doc_id not in tombstones:
+                            merged[term][doc_id] = positions
+                reader.close()
+                doc_ids.update(i for i in segment["doc_ids"] if i not in tombstones)
+
+            new_segment = _write_segment(manifest, merged, list(doc_ids))
+            names = {segment["name"] for segment in group}
+            manifest["segments"] = [
+                s for s in manifest["segments"] if s["name"] not in names
+            ] + [new_segment]
+            # Tombstones only matter while a segment still holds the doc
+            live = {i for s in manifest["segments"] for i in s["doc_ids"]}
+            manifest["tombstones"] = sorted(tombstones & live)
+            _save_manifest(manifest)
+            for name in names:
+                _remove_segment_files(name)
+            merges += 1
+    return merges
+
+
+def merge_segments_async() -> None:
+    """Run the tiered merge on a background thread"""
+    global _merge_thread
+    if _merge_thread is not None and _merge_thread.is_alive():
+        return
+    _merge_thread = threading.Thread(target=merge_segments, daemon=True)
+    _merge_thread.start()
+
+
+class SegmentedPositionalIndex(Mapping):
+    """
+    term -> {doc_id: positions} view over every live segment, with
+    tombstoned documents filtered out.
+    """
+
+    def __init__(self, manifest: Dict[str, Any]):
+        self.manifest = manifest
+        self.doc_ids: Dict[str, int] = {
+            key: entry["id"] for key, entry in manifest["docs"].items()
+        }
+        self._tombstones = set(manifest["tombstones"])
+        self._segments = [
+            CompactPositionalIndex(*_segment_paths(segment["name"]))
+            for segment in manifest["segments"]
+        ]
+        self._decoded: OrderedDict[str, Dict[int, List[int]]] = OrderedDict()
+
+    def __getitem__(self, term: str) -> Dict[int, List[int]]:
+        cached = self._decoded.get(term)
+        if cached is not None:
+            self._decoded.move_to_end(term)
+            return cached
+        postings: Dict[int, List[int]] = {}
+        hits = 0
+        for segment in self._segments:
+            if term in segment:
+                hits += 1
+                for doc_id, positions in segment[term].items():
+                    if doc_id not in self._tombstones:
+                        postings[doc_id] = positions
+        if not postings:
+            raise KeyError(term)
+        if hits > 1:
+            # Merged segments can interleave doc id ranges, keep ids ascending
+            postings = dict(sorted(postings.items()))
+        self._decoded[term] = postings
+        if len(self._decoded) > DECODED_CACHE_SIZE:
+            self._decoded.popitem(last=False)
+        return postings
+
+    def __contains__(self, term) -> bool:
+        return self.get(term) is not None
+
+    def _live_terms(self) -> List[str]:
+        """Terms with at least one posting that is not tombstoned"""
+        terms = set().union(*self._segments)
+        if self._tombstones:
+            terms = {
+                term
+                for term in terms
+                if any(
+                    doc_id not in self._tombstones
+                    for segment in self._segments
+                    if term in segment
+                    for doc_id in segment[term]
+                )
+            }
+        return sorted(terms)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._live_terms())
+
+    def __len__(self) -> int:
+        return len(self._live_terms())
+
+    def max_tf(self, term: str) -> int:
+        """Upper bound of the term frequency across live segments"""
+        return max((segment.max_tf(term) for segment in self._segments), default=0)
+
+    def doc_table(self, docs: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        """Publications laid out by segment doc id"""
+        table: List[Optional[Dict[str, Any]]] = [None] * self.manifest["next_doc_id"]
+        for doc in docs:
+            doc_id = self.doc_ids.get(doc_key(doc))
+            if doc_id is not None:
+                table[doc_id] = doc
+        return table
+
+    def close(self) -> None:
+        for segment in self._segments:
+            segment.close()
@@ -0,0 +1,108 @@
+import numpy as np
+
+from typing import List, Dict, Any, Optional
+
+from ir_core.preprocessors.analyzer import ANALYZER_VERSION, document_tokens
+from constants.constants import INDEX_FILE_PATH, TFIDF_MATRIX_FILE, TFIDF_MODEL_FILE
+
+
+def build_tfidf_index(docs: List[Dict[str, Any]]) -> Dict:
+    """
+    Fit the vectorizer over all publications and persist vocabulary,
+    IDF vector and the CSR document matrix.
+    """
+    import scipy.sparse as sp
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    # Docs carry their analyzed token stream, the vectorizer only splits it
+    vectorizer = TfidfVectorizer(analyzer=str.split)
+    tfidf_matrix = vectorizer.fit_transform(
+        " ".join(document_tokens(pub)) for pub in docs
+    ).tocsr()
+    feature_names = vectorizer.get_feature_names_out()
+
+    sp.save_npz(TFIDF_MATRIX_FILE, tfidf_matrix)
+    np.savez_compressed(
+        TFIDF_MODEL_FILE,
+        terms=feature_names.astype(str),
+        idf=vectorizer.idf_,
+        analyzer=ANALYZER_VERSION,
+    )
+
+    return _model(tfidf_matrix, feature_names, vectorizer.idf_)
+
+
+def _model(tfidf_matrix, feature_names, idf) -> Dict[str, Any]:
+    return {
+        "tfidf_matrix": tfidf_matrix,
+        # Term-major copy for batch scoring: a query row gathers only its own
+        # terms' rows, and scores come out one row per query
+        "term_matrix": tfidf_matrix.T.tocsr(),
+        "vocabulary": {term: i for i, term in enumerate(feature_names)},
+        "idf": idf,
+        "feature_names": feature_names,
+    }
+
+
+def tfidf_index_is_stale() -> bool:
+    """Artifacts missing, from an older analyzer or older than the publications"""
+    if not (TFIDF_MATRIX_FILE.exists() and TFIDF_MODEL_FILE.exists()):
+        return True
+    with np.load(TFIDF_MODEL_FILE) as model:
+        if "analyzer" not in model or int(model["analyzer"]) != ANALYZER_VERSION:
+            return True
+    if not INDEX_FILE_PATH.exists():
+        return False
+    return TFIDF_MATRIX_FILE.stat().st_mtime < INDEX_FILE_PATH.stat().st_mtime
+
+
+def load_tfidf_index() -> Optional[Dict[str, Any]]:
+    """Restore the fitted model from disk, sklearn is only needed to build it"""
+    if not (TFIDF_MATRIX_FILE.exists() and TFIDF_MODEL_FILE.exists()):
+        return None
+
+    import scipy.sparse as sp
+
+    tfidf_matrix = sp.load_npz(TFIDF_MATRIX_FILE).tocsr()
+    with np.load(TFIDF_MODEL_FILE) as model:
+        feature_names = model["terms"]
+        idf = model["idf"]
+
+    return _model(tfidf_matrix, feature_names, idf)
+
+
+def tfidf_query_vector(index: Dict[str, Any], tokens: List[str]) -> np.ndarray:
+    """TfidfVectorizer.transform for analyzed tokens: tf * idf, L2-normalised"""
+    query_vec = np.zeros(len(index["idf"]))
+    for token in tokens:
+        col = index["vocabulary"].get(token)
+        if col is not None:
+            query_vec[col] += 1
+    query_vec *= index["idf"]
+    norm = np.linalg.norm(query_vec)
+    if norm:
+        query_vec /= norm
+    return query_vec
+
+
+def tfidf_query_matrix(index: Dict[str, Any], token_lists: List[List[str]]):
+    """tfidf_query_vector for a batch of queries, one sparse CSR row each"""
+    import scipy.sparse as sp
+
+    vocabulary = index["vocabulary"]
+    rows, cols = [], []
+    for row, tokens in enumerate(token_lists):
+        for token in tokens:
+            col = vocabulary.get(token)
+            if col is not None:
+                rows.append(row)
+                cols.append(col)
+    # Duplicate (row, col) entries are summed into term counts
+    query_matrix = sp.csr_matrix(
+        (np.ones(len(rows)), (rows, cols)),
+        shape=(len(token_lists), len(index["idf"])),
+    )
+    query_matrix = query_matrix.multiply(index["idf"]).tocsr()
+    norms = np.sqrt(np.asarray(query_matrix.multiply(query_matrix).sum(axis=1)))
+    norms[norms == 0] = 1
+    return query_matrix.multiply(1 / norms).tocsr()
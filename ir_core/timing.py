@@ -0,0 +1,81 @@
+import json
+import time
+import threading
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, Iterator, Optional
+
+from constants.constants import SEARCH_METRICS_FILE
+
+# Append every timing record to SEARCH_METRICS_FILE, also per call via log=True
+METRICS_LOG = False
+
+_current: ContextVar[Optional["SearchTiming"]] = ContextVar(
+    "search_timing", default=None
+)
+_log_lock = threading.Lock()
+
+
+class SearchTiming:
+    """Wall time per stage of one search, in the order stages first ran"""
+
+    def __init__(self, query: str, engine: str):
+        self.query = query
+        self.engine = engine
+        self.spans: Dict[str, float] = {}
+        self.search_type = ""
+        self.cached = False
+        self._started = time.perf_counter()
+        self._token = None
+
+    def __enter__(self) -> "SearchTiming":
+        self._started = time.perf_counter()
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.total = time.perf_counter() - self._started
+        _current.reset(self._token)
+
+    def add(self, name: str, seconds: float) -> None:
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def record(self) -> Dict[str, Any]:
+        return {
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "query": self.query,
+            "engine": self.engine,
+            "search_type": self.search_type,
+            "cached": self.cached,
+            "total_ms": round(self.total * 1000, 3),
+            "spans_ms": {
+                name: round(seconds * 1000, 3) for name, seconds in self.spans.items()
+            },
+        }
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time a stage of the search in progress, a no-op outside timed_search"""
+    timing = _current.get()
+    if timing is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.add(name, time.perf_counter() - started)
+
+
+def current_timing() -> Optional[SearchTiming]:
+    return _current.get()
+
+
+def log_timing(record: Dict[str, Any]) -> None:
+    """Append a timing record to the local metrics log (JSONL)"""
+    line = json.dumps(record) + "\n"
+    with _log_lock:
+        with open(SEARCH_METRICS_FILE, "a") as f:
+            f.write(line)
@@ -0,0 +1,105 @@
+import heapq
+import numpy as np
+
+from operator import itemgetter
+from typing import List, Optional, Sequence, Tuple
+
+from ir_core.proximity import gallop
+
+
+def top_k_dense(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k best scores, best first, without a full sort"""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    kth = scores[np.argpartition(-scores, k - 1)[k - 1]]
+    above = np.flatnonzero(scores > kth)
+    # Ties on the k-th score keep corpus order
+    top = np.concatenate([above, np.flatnonzero(scores == kth)[: k - len(above)]])
+    return top[np.lexsort((top, -scores[top]))]
+
+
+def top_k_sparse(doc_ids: np.ndarray, scores: np.ndarray, k: int) -> np.ndarray:
+    """top_k_dense over one sparse row, doc ids need not be sorted"""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    kth = scores[np.argpartition(-scores, k - 1)[k - 1]]
+    above = np.flatnonzero(scores > kth)
+    ties = np.flatnonzero(scores == kth)
+    ties = ties[np.argsort(doc_ids[ties], kind="stable")[: k - len(above)]]
+    top = np.concatenate([above, ties])
+    return top[np.lexsort((doc_ids[top], -scores[top]))]
+
+
+def wand_top_k(
+    term_postings: List[Tuple[Sequence[int], Sequence[float], float]],
+    k: int,
+    weights: Optional[Sequence[float]] = None,
+) -> List[Tuple[float, int]]:
+    """
+    WAND over per-term (sorted doc ids, scores, max score) sequences.
+
+    The top k live in a bounded min-heap; a doc is only scored once the
+    upper bounds of the terms that can still reach it beat the heap minimum,
+    every other cursor seeks straight past it. A term's scores are scaled
+    by its weight only when a doc is scored, its max score already is.
+    """
+    if k <= 0:
+        return []
+    weights = weights or [1.0] * len(term_postings)
+    # [current doc, position, doc ids, scores, max score, weight]
+    cursors = [
+        [doc_ids[0], 0, doc_ids, scores, upper_bound, weight]
+        for (doc_ids, scores, upper_bound), weight in zip(term_postings, weights)
+        if len(doc_ids)
+    ]
+    current_doc = itemgetter(0)
+    heap: List[Tuple[float, int]] = []
+    while cursors:
+        cursors.sort(key=current_doc)
+        threshold = heap[0][0] if len(heap) >= k else -1.0
+
+        # Pivot: first cursor where the summed upper bounds can beat the heap
+        bound = 0.0
+        pivot = -1
+        for i, cursor in enumerate(cursors):
+            bound += cursor[4]
+            if bound > threshold:
+                pivot = i
+                break
+        if pivot < 0:
+            break
+
+        pivot_doc = cursors[pivot][0]
+        exhausted = False
+        if cursors[0][0] == pivot_doc:
+            score = 0.0
+            for cursor in cursors:
+                if cursor[0] != pivot_doc:
+                    break
+                pos = cursor[1]
+                score += cursor[5] * cursor[3][pos]
+                pos += 1
+                cursor[1] = pos
+                if pos < len(cursor[2]):
+                    cursor[0] = cursor[2][pos]
+                else:
+                    exhausted = True
+            entry = (score, -pivot_doc)
+            if len(heap) < k:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+        else:
+            for cursor in cursors[:pivot]:
+                pos = gallop(cursor[2], pivot_doc, cursor[1])
+                cursor[1] = pos
+                if pos < len(cursor[2]):
+                    cursor[0] = cursor[2][pos]
+                else:
+                    exhausted = True
+        if exhausted:
+            cursors = [c for c in cursors if c[1] < len(c[2])]
+
+    return [(score, -neg_doc) for score, neg_doc in sorted(heap, reverse=True)]
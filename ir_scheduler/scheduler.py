@@ -1,7 +1,7 @@
 import schedule
 import time
 
-from ir_core.crawler_main import crawl
+from ir_core.parallel_crawler import crawl_parallel
 
 BASE_URL = "https://pureportal.coventry.ac.uk"
 ORG_URL = (
@@ -12,7 +12,7 @@ ORG_URL = (
 
 def job():
     print("Weekly crawl starting ...")
-    crawl(BASE_URL, ORG_URL, False)
+    crawl_parallel(BASE_URL, ORG_URL, headless=False)
     print("Crawl successful.")
 
 
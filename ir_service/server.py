@@ -0,0 +1,192 @@
+"""
+Search over HTTP, outside Streamlit.
+
+    python -m ir_service.server [--port 8888] [--workers 4]
+
+    GET  /search?q=...&k=10&engine=auto
+    POST /search/batch   {"queries": [...], "k": 10, "engine": "auto"}
+    GET  /health
+
+The event loop only parses requests and writes JSON. Scoring runs in a pool
+of worker processes, each holding its own resident index that follows new
+generations like the Streamlit app does.
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import asyncio
+import argparse
+import multiprocessing
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Tuple
+
+import tornado.web
+
+from ir_core.index_manager import ENGINES, search_many, timed_search
+from ir_core.index_service import get_index_service
+
+SERVICE_PORT = 8888
+SEARCH_WORKERS = os.cpu_count() or 1
+MAX_TOP_K = 100
+MAX_BATCH_QUERIES = 1000
+# The analyzed token stream is only needed for indexing
+RESULT_EXCLUDE = ("content",)
+WARMUP_QUERY = "warm up search index"
+
+
+def _init_worker() -> None:
+    """Load the index and pay for lazy imports before the first request"""
+    # Ctrl+C reaches the whole process group, the parent shuts the pool down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    search_many([WARMUP_QUERY], engine="auto")
+
+
+def _public(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [
+        {k: v for k, v in doc.items() if k not in RESULT_EXCLUDE} for doc in results
+    ]
+
+
+def run_search(query: str, top_k: int, engine: str) -> Dict[str, Any]:
+    search_type, results, timing = timed_search(query, top_k, engine)
+    return {
+        "query": query,
+        "engine": engine,
+        "search_type": search_type,
+        "timing": timing,
+        "results": _public(results),
+    }
+
+
+def run_batch(queries: List[str], top_k: int, engine: str) -> Dict[str, Any]:
+    started = time.perf_counter()
+    batch = search_many(queries, top_k, engine)
+    return {
+        "engine": engine,
+        "took_ms": round((time.perf_counter() - started) * 1000, 3),
+        "results": [
+            {"query": query, "search_type": search_type, "results": _public(results)}
+            for query, (search_type, results) in zip(queries, batch)
+        ],
+    }
+
+
+def index_health() -> Dict[str, Any]:
+    snapshot = get_index_service().snapshot()
+    return {"generation": snapshot.generation, "docs": len(snapshot.docs)}
+
+
+class BaseHandler(tornado.web.RequestHandler):
+    def initialize(self, pool: ProcessPoolExecutor):
+        self.pool = pool
+
+    async def run(self, fn, *args) -> Dict[str, Any]:
+        return await asyncio.get_running_loop().run_in_executor(self.pool, fn, *args)
+
+    def search_options(self, top_k: Any, engine: Any) -> Tuple[int, str]:
+        try:
+            top_k = int(top_k)
+        except (TypeError, ValueError):
+            raise tornado.web.HTTPError(400, reason="k must be an integer")
+        if not 1 <= top_k <= MAX_TOP_K:
+            raise tornado.web.HTTPError(400, reason=f"k must be 1..{MAX_TOP_K}")
+        if engine not in ENGINES:
+            raise tornado.web.HTTPError(
+                400, reason=f"engine must be one of {', '.join(ENGINES)}"
+            )
+        return top_k, engine
+
+    def write_error(self, status_code: int, **kwargs) -> None:
+        self.finish({"error": self._reason})
+
+
+class SearchHandler(BaseHandler):
+    async def get(self):
+        query = self.get_argument("q", "").strip()
+        if not query:
+            raise tornado.web.HTTPError(400, reason="q is required")
+        top_k, engine = self.search_options(
+            self.get_argument("k", "10"), self.get_argument("engine", "auto")
+        )
+        self.write(await self.run(run_search, query, top_k, engine))
+
+
+class BatchSearchHandler(BaseHandler):
+    async def post(self):
+        try:
+            body = json.loads(self.request.body or b"{}")
+        except ValueError:
+            raise tornado.web.HTTPError(400, reason="body must be JSON")
+        queries = body.get("queries") if isinstance(body, dict) else None
+        if not isinstance(queries, list) or not all(
+            isinstance(q, str) for q in queries
+        ):
+            raise tornado.web.HTTPError(400, reason="queries must be a list of strings")
+        if len(queries) > MAX_BATCH_QUERIES:
+            raise tornado.web.HTTPError(
+                400, reason=f"at most {MAX_BATCH_QUERIES} queries per batch"
+            )
+        top_k, engine = self.search_options(
+            body.get("k", 10), body.get("engine", "auto")
+        )
+        self.write(await self.run(run_batch, queries, top_k, engine))
+
+
+class HealthHandler(BaseHandler):
+    async def get(self):
+        self.write({"status": "ok", **await self.run(index_health)})
+
+
+def make_app(pool: ProcessPoolExecutor) -> tornado.web.Application:
+    options = {"pool": pool}
+    return tornado.web.Application(
+        [
+            (r"/search", SearchHandler, options),
+            (r"/search/batch", BatchSearchHandler, options),
+            (r"/health", HealthHandler, options),
+        ]
+    )
+
+
+async def serve(host: str, port: int, workers: int) -> None:
+    # Spawned, not forked: the parent already runs an event loop
+    with ProcessPoolExecutor(
+        workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+    ) as pool:
+        loop = asyncio.get_running_loop()
+        # Start every worker up front so no request waits for an index load
+        health = await asyncio.gather(
+            *[loop.run_in_executor(pool, index_health) for _ in range(workers)]
+        )
+        server = make_app(pool).listen(port, address=host)
+        print(
+            f"Search service on http://{host}:{port} "
+            f"({workers} workers, {health[0]['docs']} docs)"
+        )
+        try:
+            await asyncio.Event().wait()
+        finally:
+            server.stop()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    parser.add_argument("--workers", type=int, default=SEARCH_WORKERS)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers))
+    except KeyboardInterrupt:
+        print("Search service stopped")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
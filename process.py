@@ -1,41 +1,50 @@
 import streamlit as st
-import time
+
+from typing import List, Dict, Any
 
 from utils.util import highlight_terms
 from ir_core.preprocessors.preprocess import preprocess, preprocess_basic
-from ir_core.index_manager import search, load_index
+from ir_core.index_manager import timed_search
+from ir_core.index_service import IndexService, get_index_service
 from ir_core.evaluation import evaluate_search
+from ir_core.corpus_stats import build_corpus_stats, load_corpus_stats
+
+
+@st.cache_resource
+def index_service() -> IndexService:
+    """One resident index for every session and rerun"""
+    return get_index_service()
+
+
+@st.cache_resource(max_entries=1)
+def corpus_stats(generation: str, _docs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Summary stats of a generation, computed in memory when the saved ones
+    predate it. Only build_indexes writes them, the app just reads.
+    """
+    return load_corpus_stats(generation) or build_corpus_stats(_docs)
 
 
-def processQuery(userQuery: str):
+def processQuery(userQuery: str, engine: str = "auto", log_timing: bool = False):
     if not userQuery:
         st.error("Enter query to search for publications.")
         return
 
-    search_type, results = search(userQuery)
+    search_type, results, timing = timed_search(
+        userQuery, engine=engine, log=log_timing
+    )
     if not results:
         st.warning("No matching publications found.")
         return
-    with st.status("Processing ...") as status:
-        if search_type == "PI":
-            status.update(label="Building positional index ...")
-            time.sleep(0.3)
-            status.update(label="Loading indexes ...")
-            time.sleep(0.2)
-            status.update(label="Phrase Searching and returning results ...")
-            time.sleep(0.2)
-            status.update(label="Search complete", state="complete", expanded=False)
-        elif search_type == "TFIDF":
-            status.update(label="Creating TF-IDF index ...")
-            time.sleep(0.3)
-            status.update(label="Calculating cosine similarities ...")
-            time.sleep(0.2)
-            status.update(label="Searching and returning results ...")
-            time.sleep(0.2)
-            status.update(label="Search complete", state="complete", expanded=False)
+    label = f"{search_type} search complete in {timing['total_ms']:.1f} ms"
+    if timing["cached"]:
+        label += " (cached)"
+    with st.status(label, state="complete", expanded=False):
+        for stage, ms in timing["spans_ms"].items():
+            st.write(f"{stage}: {ms:.2f} ms")
 
     if st.checkbox("Show evaluation metrics"):
-        metrics = evaluate_search(userQuery, results, load_index())
+        metrics = evaluate_search(userQuery, results, index_service().docs)
         st.json(metrics)
         col1, col2, col3, col4 = st.columns(4)
         col1.metric("Precision", f"{metrics['precision']:.2f}")
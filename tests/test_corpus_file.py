@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+from ir_core import corpus_file
+from ir_core.corpus_file import CorpusFile
+
+DOCS = [
+    {
+        "pub_link": f"https://example.org/publications/{i}",
+        "title": f"Résumé {{{i}}} [draft], \"quoted\"",
+        "authors": ["Ada", "Grace"][: i % 3],
+    }
+    for i in range(12)
+]
+
+
+@pytest.fixture(params=["\n", "\r\n"], ids=["lf", "crlf"])
+def corpus_path(request, tmp_path):
+    text = json.dumps(DOCS, indent=2, ensure_ascii=False)
+    path = tmp_path / "publications.json"
+    path.write_bytes(text.replace("\n", request.param).encode("utf-8"))
+    return path
+
+
+@pytest.mark.parametrize("chunk", [7, 64, 1 << 16])
+def test_records_read_back_by_offset(corpus_path, chunk, monkeypatch):
+    monkeypatch.setattr(corpus_file, "READ_CHUNK", chunk)
+    corpus = CorpusFile(corpus_path)
+    try:
+        assert len(corpus) == len(DOCS)
+        assert [corpus[doc["pub_link"]] for doc in DOCS] == DOCS
+    finally:
+        corpus.close()
+
+
+def test_offsets_match_bytes_on_disk(corpus_path):
+    data = corpus_path.read_bytes()
+    for start, length, pub in corpus_file.iter_corpus(corpus_path):
+        assert json.loads(data[start : start + length]) == pub
+
+
+def test_missing_file_is_empty(tmp_path):
+    corpus = CorpusFile(tmp_path / "publications.json")
+    assert len(corpus) == 0
+    assert "https://example.org/publications/0" not in corpus